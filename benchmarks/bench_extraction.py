@@ -0,0 +1,55 @@
+"""Compare HTML parser backends and process-pool scaling on saved page fixtures
+
+    python benchmarks/bench_extraction.py --iterations 20
+"""
+import asyncio
+import os
+import statistics
+import time
+from pathlib import Path
+import click
+from content_aggregator.extraction import HtmlExtractor, available_parsers, extract_main_text
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+
+
+def bench_parsers(fixtures, iterations):
+    print(f"{'fixture':<24} {'parser':<12} {'median ms':>10} {'min ms':>8} {'chars':>8}")
+    for path, html in fixtures:
+        for parser in available_parsers():
+            timings = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                text = extract_main_text(html, parser)
+                timings.append((time.perf_counter() - start) * 1000)
+            print(f"{path.name:<24} {parser:<12} {statistics.median(timings):>10.2f} {min(timings):>8.2f} {len(text):>8}")
+
+
+async def bench_pool(fixtures, parser, pages, workers):
+    extractor = HtmlExtractor(parser=parser, max_workers=workers)
+    documents = [html for _, html in fixtures] * (pages // len(fixtures))
+    try:
+        await extractor.main_text(documents[0])  # warm up the pool
+        start = time.perf_counter()
+        await asyncio.gather(*(extractor.main_text(html) for html in documents))
+        elapsed = time.perf_counter() - start
+    finally:
+        extractor.close()
+    print(f"{parser:<12} workers={workers:<3} {len(documents) / elapsed:>8.1f} pages/s")
+
+
+@click.command()
+@click.option('--iterations', default=10, help='Timed runs per fixture and parser')
+@click.option('--pages', default=200, help='Pages parsed in the process pool scaling run')
+def main(iterations, pages):
+    fixtures = [(path, path.read_bytes()) for path in sorted(FIXTURES_DIR.glob('*.html'))]
+    bench_parsers(fixtures, iterations)
+    print()
+    worker_counts = sorted({0, 1, 2, os.cpu_count() or 1})
+    for parser in available_parsers():
+        for workers in worker_counts:
+            asyncio.run(bench_pool(fixtures, parser, pages, workers))
+
+
+if __name__ == '__main__':
+    main()
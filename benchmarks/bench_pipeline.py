@@ -0,0 +1,155 @@
+"""End-to-end pipeline benchmark against a local fixture site and a fake Gemini
+
+    python benchmarks/bench_pipeline.py run --scenarios 10,100,1000
+    python benchmarks/bench_pipeline.py run --update-baseline
+
+Each scenario runs `ContentAggregator.run_pipeline` in a fresh process with
+its own cache and output directory, and reports articles/sec, peak RSS of
+the main process and per-stage latency. Results are compared against
+benchmarks/baseline.json; a throughput or memory regression beyond the
+tolerance exits non-zero.
+"""
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+import click
+
+BASELINE_PATH = Path(__file__).parent / 'baseline.json'
+
+
+async def run_scenario(articles, page_latency, llm_latency, rate_limit_ratio):
+    # Imported here so the environment set up by `scenario` applies to their module-level config
+    from content_aggregator import ContentAggregator
+    from content_aggregator.llm import LLMProcessor
+    from content_aggregator.metrics import metrics
+    from fake_gemini import FakeGemini
+    from fixture_server import FixtureSite
+
+    site = FixtureSite(articles, page_latency=page_latency).start()
+    gemini = FakeGemini(latency=llm_latency, rate_limit_ratio=rate_limit_ratio)
+    try:
+        llm = LLMProcessor(backend=gemini)
+        aggregator = ContentAggregator(llm=llm)
+        aggregator.config['article_sources'] = [
+            {'source_url': url, 'extract_type': 'rss'} for url in site.feed_urls
+        ]
+        aggregator.config['max_articles'] = articles
+        start = time.perf_counter()
+        await aggregator.run_pipeline()
+        elapsed = time.perf_counter() - start
+        results = aggregator.sink.read()
+    finally:
+        site.stop()
+    return {
+        'articles': articles,
+        'results': len(results),
+        'elapsed_s': round(elapsed, 3),
+        'articles_per_s': round(articles / elapsed, 3),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'llm_calls': gemini.calls,
+        'llm_rate_limited': gemini.rate_limited,
+        'stages': {
+            stage: {key: round(stats[key], 4) for key in ('count', 'p50_s', 'p95_s', 'max_s')}
+            for stage, stats in metrics.summary()['stages'].items()
+        }
+    }
+
+
+def compare(result, baseline, tolerance):
+    """Print the change against the baseline and return the regressions"""
+    regressions = []
+    checks = [('articles_per_s', -1), ('peak_rss_mb', 1)]
+    for key, direction in checks:
+        before, after = baseline[key], result[key]
+        change = (after - before) / before if before else 0.0
+        flag = ''
+        if change * direction > tolerance:
+            flag = '  ⚠️ regression'
+            regressions.append(f"{result['articles']} articles: {key} {before} -> {after}")
+        print(f"  {key:<24} {before:>10} -> {after:<10} ({change:+.1%}){flag}")
+    for stage, stats in result['stages'].items():
+        before = baseline['stages'].get(stage, {}).get('p95_s')
+        if before:
+            print(f"  {stage + ' p95':<24} {before:>10} -> {stats['p95_s']:<10} ({(stats['p95_s'] - before) / before:+.1%})")
+    return regressions
+
+
+@click.group()
+def main():
+    """Offline pipeline benchmarks"""
+    pass
+
+
+@main.command()
+@click.option('--articles', type=int, required=True)
+@click.option('--page-latency', default=0.05, help='Seconds the fixture server waits before each response')
+@click.option('--llm-latency', default=0.2, help='Seconds the fake Gemini takes per call')
+@click.option('--rate-limit-ratio', default=0.05, help='Share of fake Gemini calls answered with a 429')
+@click.option('--output', type=click.Path(), required=True, help='File the scenario result is written to')
+def scenario(articles, page_latency, llm_latency, rate_limit_ratio, output):
+    """Run one scenario in this process"""
+    output = os.path.abspath(output)
+    workdir = tempfile.mkdtemp(prefix='bench_pipeline_')
+    os.chdir(workdir)
+    os.environ['CACHE_DIR'] = os.path.join(workdir, '.cache')
+    result = asyncio.run(run_scenario(articles, page_latency, llm_latency, rate_limit_ratio))
+    with open(output, 'w') as f:
+        json.dump(result, f)
+
+
+@main.command()
+@click.option('--scenarios', default='10,100,1000', help='Comma separated article counts')
+@click.option('--page-latency', default=0.05)
+@click.option('--llm-latency', default=0.2)
+@click.option('--rate-limit-ratio', default=0.05)
+@click.option('--tolerance', default=0.2, help='Allowed relative slowdown or memory growth before failing')
+@click.option('--update-baseline', is_flag=True, help='Store these results as the new baseline')
+def run(scenarios, page_latency, llm_latency, rate_limit_ratio, tolerance, update_baseline):
+    """Run every scenario in a fresh process and compare against the baseline"""
+    env = {
+        **os.environ,
+        'PYTHONPATH': os.pathsep.join(filter(None, [str(Path(__file__).parent), os.environ.get('PYTHONPATH')])),
+        # Generous limits so the fake Gemini, not the scheduler, sets the pace
+        'GEMINI_RPM': os.environ.get('GEMINI_RPM', '600'),
+        'GEMINI_TPM': os.environ.get('GEMINI_TPM', '10000000'),
+    }
+    results = []
+    for articles in [int(count) for count in scenarios.split(',')]:
+        with tempfile.NamedTemporaryFile(suffix='.json') as output:
+            subprocess.run(
+                [sys.executable, __file__, 'scenario', '--articles', str(articles),
+                 '--page-latency', str(page_latency), '--llm-latency', str(llm_latency),
+                 '--rate-limit-ratio', str(rate_limit_ratio), '--output', output.name],
+                env=env, check=True, stdout=subprocess.DEVNULL
+            )
+            results.append(json.load(open(output.name)))
+        result = results[-1]
+        print(f"{articles:>5} articles: {result['articles_per_s']:>7.2f} articles/s, "
+              f"{result['elapsed_s']:.1f}s, peak RSS {result['peak_rss_mb']} MB, "
+              f"{result['results']} results, {result['llm_calls']} LLM calls ({result['llm_rate_limited']} rate limited)")
+
+    baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    regressions = []
+    for result in results:
+        previous = baseline.get(str(result['articles']))
+        if previous:
+            print(f"\nvs baseline, {result['articles']} articles:")
+            regressions += compare(result, previous, tolerance)
+
+    if update_baseline:
+        baseline.update({str(result['articles']): result for result in results})
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=2) + '\n')
+        print(f"\n💾 Baseline updated in {BASELINE_PATH}")
+    elif regressions:
+        print("\n❌ Regressions beyond tolerance:\n" + "\n".join(regressions))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
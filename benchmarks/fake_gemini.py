@@ -0,0 +1,44 @@
+"""Stand-in for GeminiAPI with configurable latency and injected 429s"""
+import asyncio
+import random
+from typing import Optional
+from content_aggregator.backends import LocalBackend
+from content_aggregator.budget import estimate_tokens
+from content_aggregator.exceptions import RateLimitExceededError
+from content_aggregator.metrics import metrics
+
+
+class FakeGemini(LocalBackend):
+    """Local backend that behaves like a remote one
+
+    Each call sleeps `latency` seconds (plus up to `jitter`), and a
+    `rate_limit_ratio` share of calls raises RateLimitExceededError instead.
+    """
+
+    def __init__(self, latency: float = 0.2, jitter: float = 0.05, rate_limit_ratio: float = 0.0, seed: int = 0):
+        super().__init__()
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_ratio = rate_limit_ratio
+        self.calls = 0
+        self.rate_limited = 0
+        self._random = random.Random(seed)
+
+    async def generate_content(
+        self,
+        model_key: str,
+        prompt: str,
+        temperature: float = 0.2,
+        max_tokens: Optional[int] = None,
+        response_schema: Optional[dict] = None
+    ) -> str:
+        self.calls += 1
+        with metrics.timer('llm.generate', model_key) as sample:
+            await asyncio.sleep(self.latency + self._random.uniform(0, self.jitter))
+            if self._random.random() < self.rate_limit_ratio:
+                self.rate_limited += 1
+                raise RateLimitExceededError(retry_after=self.RETRY_AFTER_DEFAULT)
+            response = self.respond(model_key, prompt, response_schema)
+            sample['tokens_in'] = estimate_tokens(prompt)
+            sample['tokens_out'] = estimate_tokens(response)
+            return response
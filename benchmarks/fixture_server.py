@@ -0,0 +1,153 @@
+"""Local HTTP server replaying the saved page fixtures as a site of RSS feeds, posts and PDFs
+
+Every post reuses a recorded page, with its article body swapped for seeded
+text so posts are distinct and near-duplicate detection keeps them apart.
+"""
+import io
+import random
+import re
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List, Optional
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+POSTS_PER_FEED = 50
+
+_ARTICLE = re.compile(rb'<article\b.*?</article>', re.DOTALL)
+_BODY_OPEN = re.compile(rb'<body\b[^>]*>')
+_TAGS = re.compile(r'<[^>]+>')
+_WORD = re.compile(r'[a-z]{3,12}')
+
+
+def make_pdf(pages: List[str]) -> bytes:
+    """Build a minimal PDF with one line of text per page"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n{obj}\nendobj\n".encode())
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    out.write("".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+
+class FixtureSite:
+    """Serves `articles` posts behind ceil(articles / POSTS_PER_FEED) RSS feeds
+
+    Every `pdf_every`-th post is a PDF. Each response is delayed by
+    `page_latency` seconds to stand in for network time.
+    """
+
+    def __init__(self, articles: int, page_latency: float = 0.05, pdf_every: int = 20):
+        self.articles = articles
+        self.page_latency = page_latency
+        self.pdf_every = pdf_every
+        self.pages = [path.read_bytes() for path in sorted(FIXTURES_DIR.glob('*.html'))]
+        self.vocabulary = sorted(set(_WORD.findall(_TAGS.sub(' ', self.pages[0].decode('utf-8', 'ignore')).lower())))
+        self.published = formatdate(time.time() - 3600)
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def feed_urls(self) -> List[str]:
+        feeds = (self.articles + POSTS_PER_FEED - 1) // POSTS_PER_FEED
+        return [f"{self.base_url}/feeds/{feed}.xml" for feed in range(feeds)]
+
+    def start(self) -> 'FixtureSite':
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                time.sleep(site.page_latency)
+                found = site.respond(self.path)
+                if found is None:
+                    self.send_error(404)
+                    return
+                content_type, body = found
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def respond(self, path: str):
+        name, _, extension = path.rsplit('/', 1)[-1].partition('.')
+        if not name.isdigit():
+            return None
+        number = int(name)
+        if path.startswith('/feeds/') and extension == 'xml':
+            return 'application/rss+xml', self.feed(number)
+        if number >= self.articles:
+            return None
+        if path.startswith('/posts/') and extension == 'html':
+            return 'text/html; charset=utf-8', self.post(number)
+        if path.startswith('/papers/') and extension == 'pdf':
+            return 'application/pdf', make_pdf(self.paragraphs(number, count=6, words=12))
+        return None
+
+    def post_url(self, number: int) -> str:
+        if self.pdf_every and number % self.pdf_every == self.pdf_every - 1:
+            return f"{self.base_url}/papers/{number}.pdf"
+        return f"{self.base_url}/posts/{number}.html"
+
+    def feed(self, number: int) -> bytes:
+        items = "".join(
+            f"<item><title>Post {post}</title><link>{self.post_url(post)}</link>"
+            f"<guid>{self.post_url(post)}</guid><author>author{post % 7}@example.com</author>"
+            f"<pubDate>{self.published}</pubDate></item>"
+            for post in range(number * POSTS_PER_FEED, min(self.articles, (number + 1) * POSTS_PER_FEED))
+        )
+        return (
+            f'<?xml version="1.0"?><rss version="2.0"><channel><title>Feed {number}</title>'
+            f'<link>{self.base_url}</link><description>Benchmark feed</description>{items}</channel></rss>'
+        ).encode()
+
+    def post(self, number: int) -> bytes:
+        article = "<article><h1>Post {0}</h1>{1}</article>".format(
+            number, "".join(f"<p>{paragraph}</p>" for paragraph in self.paragraphs(number))
+        ).encode()
+        page = self.pages[number % len(self.pages)]
+        if _ARTICLE.search(page):
+            return _ARTICLE.sub(lambda _: article, page, count=1)
+        return _BODY_OPEN.sub(lambda match: match.group(0) + article, page, count=1)
+
+    def paragraphs(self, number: int, count: int = 8, words: int = 60) -> List[str]:
+        rng = random.Random(number)
+        return [
+            " ".join(rng.choice(self.vocabulary) for _ in range(words)).capitalize() + "."
+            for _ in range(count)
+        ]
@@ -6,5 +6,12 @@ FILE_NAME=${1:-processed_articles.md}
 echo -e "---\n### Articles Processed" >> $FILE_NAME
 echo -e "| 📑 Article | 👤 Author | 📄 Summary | 🏷️ Tags |" >> $FILE_NAME
 echo -e "|---------|-----------|-----------|--------|" >> $FILE_NAME
-jq -r '.[] | "| [🔗](\(.url)) \(.title) | \(.author) | \(.summary) | \(.tags) |"' outputs/*.json >> $FILE_NAME 2>/dev/null || echo "No articles processed today" >> $FILE_NAME
+# Prefer the finalized results, falling back to the JSON Lines stream of a run that didn't finish
+ROWS=$({ jq -c '.[]' outputs/results_*.json 2>/dev/null || cat outputs/results_*.jsonl 2>/dev/null; } \
+  | jq -r '"| [🔗](\(.url)) \(.title) | \(.author) | \(.summary) | \(.tags) |"' 2>/dev/null)
+if [ -n "$ROWS" ]; then
+  echo "$ROWS" >> $FILE_NAME
+else
+  echo "No articles processed today" >> $FILE_NAME
+fi
 echo -e "---\n*🤖 Automated Report [$(date +'%Y-%m-%d %H:%M:%S %Z')]*" >> $FILE_NAME 
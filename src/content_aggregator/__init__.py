@@ -1,14 +1,23 @@
 from dotenv import load_dotenv
-import json
 from datetime import datetime
+import hashlib
 import os
 import time
 import sys
-from .utils import deduplicate
-from typing import List, Dict, Any
+from .utils import as_async_iter
+from .canonical import canonical_url
+from typing import AsyncIterable, AsyncIterator, List, Dict, Any, Optional, Set, Union
 from .scraper import Scraper
 from .llm import LLMProcessor
 from .models import Article
+from .run_state import ProcessedIndex
+from .dedup import NearDuplicateIndex
+from .dates import DateExtractor
+from .discovery import SourceDiscovery
+from .pipeline import Pipeline, Stage
+from .sink import JsonlSink
+from .checkpoint import RunCheckpoint
+from .metrics import metrics
 from .exceptions import RateLimitExceededError
 import asyncio
 import click
@@ -19,9 +28,25 @@ __all__ = ['ContentAggregator', 'Scraper', 'LLMProcessor', 'Article']
 class ContentAggregator:
     """Main class orchestrating the content aggregation workflow"""
     
-    def __init__(self):
-        self.scraper = Scraper()
-        self.llm = LLMProcessor()
+    def __init__(
+        self,
+        since_last_run: bool = False,
+        resume_run_id: Optional[str] = None,
+        scraper: Optional[Scraper] = None,
+        llm: Optional[LLMProcessor] = None
+    ):
+        self.run_id = resume_run_id or datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.since_last_run = since_last_run
+        self.resuming = resume_run_id is not None
+        self.checkpoint = RunCheckpoint(self.run_id)
+        self.output_dir = "outputs"
+        # Completed articles are streamed here, and a resumed run appends to the same file
+        self.sink = JsonlSink(f"{self.output_dir}/results_{self.run_id}.jsonl")
+        self.scraper = scraper or Scraper()
+        self.llm = llm or LLMProcessor()
+        self.processed = ProcessedIndex()
+        # Don't extract more document text than the LLM stage will read
+        self.scraper.limits['pdf_max_chars'] = self.llm.max_input_chars
         self.config = {
             'article_sources': [
                 {
@@ -104,26 +129,80 @@ class ContentAggregator:
                 },
             ],
             'max_articles': int(os.getenv('ARTICLES_LIMIT', 500)),
-            'retry_delay_seconds': 15
+            'scrape_workers': int(os.getenv('SCRAPE_WORKERS', 4)),
+            # One in-flight parse per parser process
+            'extract_workers': max(1, self.scraper.extractor.max_workers),
+            'llm_workers': int(os.getenv('LLM_WORKERS', 2)),
+            'llm_batch_size': int(os.getenv('LLM_BATCH_SIZE', 8)),
+            'stage_queue_size': int(os.getenv('PIPELINE_QUEUE_SIZE', 16)),
+            'dedup_max_distance': int(os.getenv('DEDUP_MAX_DISTANCE', 6)),
+            'rss_window_seconds': 86400,
+            # Date index source links with heuristics, asking the LLM only when none of them finds a date
+            'index_date_filter': os.getenv('INDEX_DATE_FILTER', 'true').lower() == 'true',
+            'date_llm_fallback': os.getenv('DATE_LLM_FALLBACK', 'true').lower() == 'true',
+            # A stuck source is abandoned after this long, and discovery as a whole after the second
+            'source_timeout_seconds': float(os.getenv('SOURCE_TIMEOUT_SECONDS', 90)),
+            # Dating an index source's links gives up before the source does, keeping the rest undated
+            'index_date_timeout_seconds': float(os.getenv('INDEX_DATE_TIMEOUT_SECONDS', 60)),
+            'discovery_timeout_seconds': float(os.getenv('DISCOVERY_TIMEOUT_SECONDS', 300)),
+            # Optional Prometheus textfile export of the run metrics
+            'metrics_prometheus_file': os.getenv('METRICS_PROMETHEUS_FILE')
         }
+        self.window_start = time.time() - self.config['rss_window_seconds']
+        self.dates = DateExtractor(
+            self.scraper.http,
+            llm_extract=self.llm.extract_date_llm if self.config['date_llm_fallback'] else None,
+            # Pages read for a date are handed to the fetch stage instead of downloaded twice
+            fetch_html=self.scraper.prefetch_html
+        )
 
     async def run_pipeline(self) -> None:
         """Main execution pipeline"""
-        articles = await self.gather_articles()
-        await self.process_articles(articles)
+        last_run_started_at = self.processed.last_run_started_at()
+        if self.since_last_run and last_run_started_at:
+            self.window_start = last_run_started_at
+            print(f"⏱️ Only considering articles published since the last run at {datetime.fromtimestamp(last_run_started_at).isoformat()}")
+        self.processed.start_run(self.run_id)
+        metrics.reset()
+        try:
+            async with self.scraper:
+                gathered = self.checkpoint.load_gathered() if self.resuming else None
+                articles: Union[List[Article], AsyncIterable[Article]]
+                if gathered is None:
+                    # Processing starts with the first source to finish
+                    articles = self._gather_and_checkpoint()
+                else:
+                    print(f"⏯️ Resuming run {self.run_id} with {len(gathered)} gathered articles")
+                    articles = gathered
+                with metrics.timer('pipeline.process'):
+                    await self.process_articles(articles)
+            self.scraper.save_feed_state(self._settled)
+            self.processed.finish_run(self.run_id)
+            self.checkpoint.delete()
+        finally:
+            self.write_metrics()
+
+    def write_metrics(self) -> None:
+        """Print per-stage latencies and save them for comparison across runs"""
+        for stage, stats in metrics.summary()['stages'].items():
+            print(f"⏱️ {stage}: n={stats['count']} p50={stats['p50_s']:.2f}s p95={stats['p95_s']:.2f}s max={stats['max_s']:.2f}s")
+        metrics_filename = f"{self.output_dir}/metrics_{self.run_id}.json"
+        metrics.write_json(metrics_filename)
+        if self.config['metrics_prometheus_file']:
+            metrics.write_prometheus(self.config['metrics_prometheus_file'])
+        print(f"📊 Metrics saved to {metrics_filename}")
 
-    # TODO: consider recursively extracting articles with a max depth as some source_url may be an index for another index
     async def extract_articles(self, source_url, extract_type, extract_params={'css_selector': 'a[href]'}, limit=100):
         """Main workflow: Extract URLs -> Filter by date -> Process articles"""
         print(f"🚀 Starting extracting articles from {source_url}")
         
         if extract_type == 'rss':
-            current_time = time.time()
-            one_day_ago = current_time - 86400
             articles = await self.scraper.extract_from_rss(source_url)
-            articles = [x for x in articles if x.get('publish_at', 0) > one_day_ago]
+            articles = [x for x in articles if (x.get('publish_at') or 0) > self.window_start]
         elif extract_type == 'index':
-            articles = await self.scraper.extract_from_index(source_url, **extract_params)
+            articles = (await self.scraper.extract_from_index(source_url, **extract_params))[:limit]
+            if self.config['index_date_filter'] and articles:
+                articles = await self._filter_index_by_date(source_url, articles)
         else:
             raise ValueError(f"Invalid extract type: {extract_type}")
         
@@ -134,114 +213,309 @@ class ContentAggregator:
         print(f"📚 Found {len(articles[:limit])} potential articles from {source_url} with limit {limit}")
         return articles[:limit]
 
-    async def process_articles(self, articles: List[Article]) -> List[Article]:
-        results = []
+    async def process_articles(self, articles: Union[List[Article], AsyncIterable[Article]]) -> List[Article]:
+        """Scrape and summarize articles through a pipeline of bounded stages
+
+        Articles may be a list or a stream still being discovered. They flow
+        through dedup -> fetch -> extract -> summarize -> sink stages, each
+        with its own workers and a bounded queue, so a slow stage holds back
+        the ones before it instead of piling up work. Near-duplicates of an
+        already extracted article are folded into its `sources` instead of
+        being summarized again, and the next copy is summarized if that
+        article fails. Each article is appended to the results stream
+        as it completes; the final JSON keeps input order.
+        """
+        started = time.perf_counter()
+        gathered: List[Article] = []
+        written = 0
+        sources: Dict[int, List[str]] = {}
+        near_duplicates = NearDuplicateIndex(max_distance=self.config['dedup_max_distance'])
         already_retried = set()
-        while len(articles) > 0:
-            article = articles.pop(0)
-            url = article.get('url')
-            
-            if not url:
+        queued = set()
+        content_hashes: Dict[str, str] = {}
+        written_indexes: Set[int] = set()
+        # Near-duplicate groups, keyed by their first member: the member being summarized
+        # (None once every member tried so far has failed) and duplicates waiting on it
+        heads: Dict[int, Optional[int]] = {}
+        waiting: Dict[int, List[Dict[str, Any]]] = {}
+        
+        def retry(item: Dict[str, Any]) -> bool:
+            """Send an article back to the fetch stage once, mirroring the serial loop's retry-at-the-end"""
+            url = item['article'].get('url')
+            if url in already_retried:
+                return False
+            already_retried.add(url)
+            pipeline.submit('fetch', {'index': item['index'], 'article': item['article']})
+            return True
+        
+        def give_up(item: Dict[str, Any]):
+            """Drop an article for good, summarizing the next duplicate waiting on it instead"""
+            group = item.get('group', item['index'])
+            if heads.get(group) != item['index']:
+                return
+            sources.pop(item['index'], None)
+            members = waiting.pop(group, [])
+            if not members:
+                heads[group] = None
+                return
+            successor = members[0]
+            heads[group] = successor['index']
+            sources[successor['index']] = [member['article']['url'] for member in members]
+            if members[1:]:
+                waiting[group] = members[1:]
+            print(f"🔁 Summarizing duplicate {successor['article']['url']} in place of {item['article'].get('url')}")
+            pipeline.submit('summarize', successor)
+        
+        def handle_rate_limit(item: Dict[str, Any]):
+            # the LLM scheduler has already backed off, so re-queue without waiting here
+            url = item['article'].get('url')
+            if retry(item):
+                print(f"🔄 Re-queued {url} after exhausting rate limit retries")
+            else:
+                print(f"⚠️ Already retried {url} - skipping")
+                give_up(item)
+        
+        async def dedup(entry):
+            index, article = entry
+            if not article.get('url'):
                 print(f"⚠️ Empty URL for {article} - skipping")
-                continue
-            
+                return None
+            key = canonical_url(article['url'])
+            if key in already_done or key in queued:
+                return None
+            queued.add(key)
+            return {'index': index, 'article': article}
+        
+        async def fetch(item):
+            url = item['article']['url']
             print(f"\n📄 Processing article {url}")
-            
-            try:
-                print("Scrape content...")
-                article_content = await self.scraper.scrape_article(url)
-                if not article_content:
-                    print(f"⚠️ Empty content for {url} - skipping")
-                    continue
-                    
-                # Generate summary
-                print("Generating summary...")
-                summary = await self.llm.summarize_post(article_content, url)
-                if summary.get('summary') is None:
-                    print(f"❌ Error processing {url} - returned empty summary")
-                    if url not in already_retried:
-                        already_retried.add(url)
-                        articles.append(article)
-                        continue
-                else:
-                    results.append(Article(
-                        url=url,
-                        tags=summary.get('tags'),
-                        date=summary.get('date'),
-                        summary=summary.get('summary'),
-                        author=article.get('author') or summary.get('author'),
-                        title=article.get('title') or summary.get('title'),
-                        publish_at=article.get('publish_at'),
-                        timestamp=datetime.now().isoformat()
-                    ))
-                
-                print(f"✅ Successfully processed: {url}")
-                
-            # TODO: exponential backoff in retry?
-            except RateLimitExceededError as e:
-                if url not in already_retried:
-                    retry_after = e.retry_after or self.config['retry_delay_seconds']
-                    print(f"🔄 Retrying {url} in {retry_after} seconds")
-                    time.sleep(retry_after)
-                    
-                    already_retried.add(url)
-                    articles.append(article)
+            item['content'] = self.checkpoint.scraped_content(url)
+            if item['content'] is None:
+                try:
+                    item['page'] = await self.scraper.fetch_article(url, render=item.get('render', False))
+                except Exception as e:
+                    print(f"Scraping error: {str(e)}")
+                    item['content'] = ""
+            return item
+        
+        async def extract(item):
+            index, url = item['index'], item['article']['url']
+            if item['content'] is None:
+                try:
+                    article_content = await self.scraper.extract_article(item.pop('page'))
+                except Exception as e:
+                    print(f"Scraping error: {str(e)}")
+                    article_content = ""
+                if article_content is None:
+                    # Too little text without JavaScript, fetch it again through the browser
+                    item['render'] = True
+                    pipeline.submit('fetch', item)
+                    return None
+                item['content'] = article_content
+                self.checkpoint.save_scraped(url, article_content)
+            article_content = item['content']
+            if not article_content:
+                print(f"⚠️ Empty content for {url} - skipping")
+                return None
+            content_hashes[url] = hashlib.sha256(article_content.encode('utf-8')).hexdigest()
+            group = near_duplicates.add(index, article_content)
+            item['group'] = index if group is None else group
+            representative = heads.get(item['group'])
+            if representative is None:
+                # First of its group, or every earlier member failed to summarize
+                representative = heads[item['group']] = index
+            if representative != index:
+                sources[representative].append(url)
+                if representative in written_indexes:
+                    self.checkpoint.mark_summarized(url, 'duplicate')
+                    self.processed.mark_processed(url, content_hashes[url])
                 else:
-                    print(f"⚠️ Already retried {url} - skipping")
-                    continue
-                
+                    # Recorded with the representative once it has a summary, or summarized if it fails
+                    waiting.setdefault(item['group'], []).append(item)
+                print(f"🔁 {url} duplicates {gathered[representative].get('url')} - merged as a source")
+                return None
+            sources.setdefault(index, [url])
+            return item
+        
+        async def summarize(items):
+            # Generate summaries
+            print(f"Generating summaries for {[item['article'].get('url') for item in items]}...")
+            try:
+                summaries = await self.llm.summarize_many(
+                    [(item['content'], item['article'].get('url')) for item in items]
+                )
+            except RateLimitExceededError:
+                for item in items:
+                    handle_rate_limit(item)
+                return [None] * len(items)
             except Exception as e:
-                print(f"❌ Error processing {url} - {str(e)}")
-                pass
-            
-        # Create the output directory if it doesn't exist
-        output_dir = "outputs"
-        os.makedirs(output_dir, exist_ok=True)
-        file_prefix = f"results_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                for item in items:
+                    print(f"❌ Error processing {item['article'].get('url')} - {str(e)}")
+                    give_up(item)
+                return [None] * len(items)
+            results = []
+            for item, summary in zip(items, summaries):
+                if not self.llm.has_summary(summary):
+                    # Left unrecorded, so a later run tries it again
+                    print(f"❌ Error processing {item['article'].get('url')} - returned empty summary")
+                    if not retry(item):
+                        give_up(item)
+                    results.append(None)
+                    continue
+                item['summary'] = summary
+                results.append(item)
+            return results
+        
+        async def write(item):
+            nonlocal written
+            index, article, summary = item['index'], item['article'], item['summary']
+            url = article.get('url')
+            self.sink.write(Article(
+                url=url,
+                tags=summary.get('tags'),
+                date=summary.get('date'),
+                summary=summary.get('summary'),
+                author=article.get('author') or summary.get('author'),
+                title=article.get('title') or summary.get('title'),
+                publish_at=article.get('publish_at'),
+                timestamp=datetime.now().isoformat(),
+                sources=sources.get(index, [url])
+            ))
+            written += 1
+            if written == 1:
+                metrics.record('pipeline.first_result', time.perf_counter() - started)
+            self.checkpoint.mark_summarized(url, 'done')
+            for source_url in sources.get(index, [url]):
+                self.processed.mark_processed(source_url, content_hashes.get(source_url))
+                if source_url != url:
+                    self.checkpoint.mark_summarized(source_url, 'duplicate')
+            waiting.pop(item['group'], None)
+            written_indexes.add(index)
+            print(f"✅ Successfully processed: {url}")
+            return None
+        
+        async def indexed():
+            async for article in as_async_iter(articles):
+                gathered.append(article)
+                yield len(gathered) - 1, article
         
-        json_filename = f"{output_dir}/{file_prefix}.json"
-        with open(json_filename, 'w') as f:
-            json.dump(results, f, indent=2)
+        # Articles summarized before an interruption are re-summarized from the summary
+        # cache if the results stream was lost, so only the stream and merged duplicates count
+        already_written = self.sink.completed_urls()
+        already_merged = self.checkpoint.summarized_urls('duplicate')
+        if already_written or already_merged:
+            print(f"⏯️ Skipping {len(already_written)} articles already written and {len(already_merged)} merged duplicates")
+        already_done = already_written | already_merged
+        
+        queue_size = self.config['stage_queue_size']
+        pipeline = Pipeline([
+            Stage('dedup', dedup, queue_size=queue_size),
+            Stage('fetch', fetch, workers=self.config['scrape_workers'], queue_size=queue_size),
+            Stage('extract', extract, workers=self.config['extract_workers'], queue_size=queue_size),
+            Stage(
+                'summarize', summarize,
+                workers=self.config['llm_workers'],
+                queue_size=max(queue_size, self.config['llm_workers'] * self.config['llm_batch_size']),
+                batch_size=self.config['llm_batch_size']
+            ),
+            Stage('sink', write, queue_size=queue_size),
+        ])
+        await pipeline.run(indexed())
+        print(f"📝 Wrote {written} articles to {self.sink.path}")
+        print(f"💾 Summary cache: {self.llm.summary_cache.stats()}")
+        
+        # Duplicates found after their representative was written only live in `sources`
+        position = {article.get('url'): index for index, article in enumerate(gathered)}
+        results = self.sink.read()
+        for result in results:
+            late_sources = sources.get(position.get(result['url'], -1), [])
+            if len(late_sources) > len(result.get('sources') or []):
+                result['sources'] = late_sources
+        results.sort(key=lambda result: position.get(result['url'], len(position)))
+        merged = sum(len(result.get('sources') or [result['url']]) - 1 for result in results)
+        if merged:
+            print(f"🔁 Merged {merged} near-duplicate articles into {len(results)} results")
+        
+        os.makedirs(self.output_dir, exist_ok=True)
+        file_prefix = f"results_{self.run_id}"
+        json_filename = f"{self.output_dir}/{file_prefix}.json"
+        self.sink.finalize(json_filename, results)
         
         # Generate executive summary
         print("Generating executive summary...")
         executive_summary = await self.llm.summarize_all([x.get('summary') for x in results])
-        summary_filename = f"{output_dir}/{file_prefix}_summary.txt"
+        summary_filename = f"{self.output_dir}/{file_prefix}_summary.txt"
         with open(summary_filename, 'w') as f:
             f.write(executive_summary)
         
         print(f"\n🎉 Done! Results saved to {json_filename} and {summary_filename}")
         return results
 
-    async def gather_articles(self):
+    async def gather_articles(self) -> List[Article]:
         """Run multiple extraction tasks concurrently and combine results"""
+        return [article async for article in self.discover_articles()]
+
+    async def discover_articles(self) -> AsyncIterator[Article]:
+        """Stream articles from every source as each one finishes
+
+        Sources run concurrently under per-source and overall deadlines, and
+        `max_articles` is split across them by a fair-share allocator, so the
+        total never exceeds the limit.
+        """
+        seen = set()
+        skipped = 0
         
-        # TODO: source_url for index extract type should implicitly include the date range as there is no reliable way to get the date range from the index page, think of a better way to do this
-        article_tasks = self.config['article_sources']
-        
-        # Create all coroutines
-        coroutines = [self.extract_articles(**task) for task in article_tasks]
+        def select(articles: List[Article]) -> List[Article]:
+            nonlocal skipped
+            unique = []
+            for article in articles:
+                key = canonical_url(article['url']) if article.get('url') else None
+                if key not in seen:
+                    seen.add(key)
+                    unique.append(article)
+            new_articles = self.processed.filter_new(unique)
+            skipped += len(unique) - len(new_articles)
+            return new_articles
         
-        # Run all tasks concurrently
-        results = await asyncio.gather(*coroutines)
-        flattened_results = [item for sublist in results for item in sublist]
+        discovery = SourceDiscovery(
+            self.extract_articles,
+            budget=self.config['max_articles'],
+            source_timeout=self.config['source_timeout_seconds'],
+            total_timeout=self.config['discovery_timeout_seconds'],
+            select=select
+        )
+        found = 0
+        async for article in discovery.stream(self.config['article_sources']):
+            found += 1
+            yield article
         
-        if len(flattened_results) == 0:
+        if skipped:
+            print(f"⏭️ Skipping {skipped} articles already processed in earlier runs")
+        if found == 0:
             print("⚠️ No articles found from any sources")
-            return []
-      
-        # distribute the limit across all sources by the proportion of the number of articles found
-        # TODO: there's a chance that the total number exceeds the limit, need to handle this
-        weighted_results = [result[:(int(len(result) / len(flattened_results) * self.config['max_articles']) or 1)] for result in results]
+        print(f"🎉 Done! Out of limit={self.config['max_articles']}, found {found} articles in total")
 
-        # Combine and deduplicate
-        combined = deduplicate(
-            [item for articles in weighted_results for item in articles],
-            key_func=lambda x: x.get('url')
-        )
-        
-        print(f"🎉 Done! Out of limit={self.config['max_articles']}, found {len(combined)} articles in total: {combined} ")
-        return combined[:self.config['max_articles']]
+    # Private helpers
+    def _settled(self, article: Article) -> bool:
+        """Whether a feed entry needs no further work: processed, or outside the window"""
+        return (article.get('publish_at') or 0) <= self.window_start or self.processed.is_processed(article['url'])
+
+    async def _filter_index_by_date(self, source_url: str, articles: List[Article]) -> List[Article]:
+        """Keep index links published inside the window, and those no date could be found for"""
+        await self.dates.annotate(articles, timeout=self.config['index_date_timeout_seconds'])
+        in_window = [x for x in articles if x.get('publish_at') is None or x['publish_at'] > self.window_start]
+        undated = sum(1 for x in articles if x.get('publish_at') is None)
+        print(f"📅 {source_url}: {len(in_window)} of {len(articles)} links in the window ({undated} undated, kept)")
+        return in_window
+
+    async def _gather_and_checkpoint(self) -> AsyncIterator[Article]:
+        """Discovered articles, checkpointed once discovery completes"""
+        gathered = []
+        with metrics.timer('pipeline.gather'):
+            async for article in self.discover_articles():
+                gathered.append(article)
+                yield article
+        self.checkpoint.save_gathered(gathered)
 
 # Add Click integration at the bottom
 @click.group()
@@ -250,13 +524,16 @@ def main():
     pass
 
 @main.command()
-def run():
+@click.option('--since-last-run', is_flag=True, help='Only consider articles published since the last completed run')
+@click.option('--resume', 'resume_run_id', metavar='RUN_ID', help='Continue an interrupted run, skipping articles it already wrote')
+def run(since_last_run, resume_run_id):
     """Run the aggregation pipeline"""
+    aggregator = ContentAggregator(since_last_run=since_last_run, resume_run_id=resume_run_id)
     try:
-        aggregator = ContentAggregator()
         asyncio.run(aggregator.run_pipeline())
     except KeyboardInterrupt:
         print("\n🛑 Script interrupted by user")
+        print(f"⏯️ Continue with: content-aggregator run --resume {aggregator.run_id}")
         sys.exit(1)
 
 if __name__ == "__main__":
@@ -0,0 +1,228 @@
+import asyncio
+import json
+import os
+import re
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, Optional
+
+_BATCH_MARKER = re.compile(r'^=== Article (\d+) ===$', re.MULTILINE)
+_SENTENCE = re.compile(r'[^.!?\n]+[.!?]?')
+_ISO_DATE = re.compile(r'\b(\d{4}-\d{2}-\d{2})\b')
+_WORD = re.compile(r'[a-z]{5,}')
+
+
+class LLMBackend(ABC):
+    """Interface LLMProcessor uses to talk to a model provider
+
+    `model_names` maps the processor's model keys ('summarize',
+    'date_extract') to provider model names and is part of cache keys.
+    """
+
+    RETRY_AFTER_DEFAULT: float = 15
+    # Concurrent calls allowed to this backend, None for no limit
+    max_concurrency: Optional[int] = None
+    model_names: Dict[str, str]
+
+    @abstractmethod
+    async def generate_content(
+        self,
+        model_key: str,
+        prompt: str,
+        temperature: float = 0.2,
+        max_tokens: Optional[int] = None,
+        response_schema: Optional[dict] = None
+    ) -> str:
+        """Generate a completion, raising RateLimitExceededError on a 429
+
+        With a `response_schema`, the backend answers with JSON matching it.
+        """
+
+
+class BackendWrapper(LLMBackend):
+    """Base for backends that decorate another backend"""
+
+    def __init__(self, backend: LLMBackend):
+        self.backend = backend
+        self.model_names = backend.model_names
+        self.RETRY_AFTER_DEFAULT = backend.RETRY_AFTER_DEFAULT
+
+    async def generate_content(self, model_key, prompt, temperature=0.2, max_tokens=None, response_schema=None) -> str:
+        return await self.backend.generate_content(model_key, prompt, temperature, max_tokens, response_schema)
+
+
+class ConcurrencyLimitedBackend(BackendWrapper):
+    """Caps the number of in-flight calls to a backend
+
+    Wrapping a HedgedBackend, a call holds one slot for all its attempts;
+    share `slots` with the HedgedBackend so each duplicate takes a slot of
+    its own, as `create_backend` does.
+    """
+
+    def __init__(self, backend: LLMBackend, max_concurrency: int):
+        super().__init__(backend)
+        self.max_concurrency = max_concurrency
+        self.slots = asyncio.Semaphore(max_concurrency)
+
+    async def generate_content(self, model_key, prompt, temperature=0.2, max_tokens=None, response_schema=None) -> str:
+        async with self.slots:
+            return await self.backend.generate_content(model_key, prompt, temperature, max_tokens, response_schema)
+
+
+class HedgedBackend(BackendWrapper):
+    """Issues a duplicate call when the first is slower than `hedge_after` seconds
+
+    The first successful answer wins and the other call is cancelled; an
+    error is only raised once every call has failed. Duplicates are sent
+    only once `admit_hedge` (set by LLMScheduler) lets them through, so they
+    count against the same rate limits as first attempts, and only once
+    they get one of the `slots` (set by `create_backend`) shared with the
+    concurrency limit, so they count against it too.
+    """
+
+    def __init__(self, backend: LLMBackend, hedge_after: float, max_hedges: int = 1):
+        super().__init__(backend)
+        self.hedge_after = hedge_after
+        self.max_hedges = max_hedges
+        self.hedges = 0
+        self.admit_hedge: Optional[Callable[[str, Optional[int]], Awaitable[None]]] = None
+        self.slots: Optional[asyncio.Semaphore] = None
+
+    async def generate_content(self, model_key, prompt, temperature=0.2, max_tokens=None, response_schema=None) -> str:
+        async def call(hedge: bool) -> str:
+            if hedge and self.admit_hedge is not None:
+                await self.admit_hedge(prompt, max_tokens)
+            if hedge and self.slots is not None:
+                async with self.slots:
+                    return await self.backend.generate_content(model_key, prompt, temperature, max_tokens, response_schema)
+            return await self.backend.generate_content(model_key, prompt, temperature, max_tokens, response_schema)
+
+        pending = {asyncio.ensure_future(call(hedge=False))}
+        launched = 1
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                can_hedge = launched <= self.max_hedges
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=self.hedge_after if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+                if not done and can_hedge:
+                    self.hedges += 1
+                    pending.add(asyncio.ensure_future(call(hedge=True)))
+                    launched += 1
+            if error is None:
+                raise RuntimeError("Hedged call finished without an answer")
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+class LocalBackend(LLMBackend):
+    """Deterministic, credential-free backend for tests, benchmarks and CI
+
+    Answers the prompts LLMProcessor sends in the format it parses, built
+    from the input text itself: titles from first lines, summaries from first
+    sentences and dates from the first ISO date found.
+    """
+
+    RETRY_AFTER_DEFAULT = 0.5
+
+    def __init__(self):
+        self.model_names = {'summarize': 'local-summarize', 'date_extract': 'local-date-extract'}
+
+    async def generate_content(self, model_key, prompt, temperature=0.2, max_tokens=None, response_schema=None) -> str:
+        return self.respond(model_key, prompt, response_schema)
+
+    def respond(self, model_key: str, prompt: str, response_schema: Optional[dict] = None) -> str:
+        if model_key == 'date_extract':
+            match = _ISO_DATE.search(prompt.split('HTML Content:', 1)[-1])
+            return f"{{{match.group(1)}}}" if match else 'null'
+        if prompt.startswith("Condense"):
+            return "\n".join(f"- {self._first_sentence(line)}" for line in self._section(prompt, "Summaries:").splitlines() if line.strip())
+        if prompt.startswith("Generate an executive summary"):
+            points = [line for line in self._section(prompt, "Text to analyze:").split("Rules:")[0].splitlines() if line.strip()]
+            return "**Key Insights**\n" + "\n".join(f"- {self._first_sentence(point.lstrip('- '))}" for point in points)
+        articles = _BATCH_MARKER.split(self._section(prompt, "Articles:"))
+        if len(articles) > 1:
+            summaries = [(int(article_id), self._summary(text)) for article_id, text in zip(articles[1::2], articles[2::2])]
+            if response_schema:
+                return json.dumps([{'id': article_id, **fields} for article_id, fields in summaries])
+            return "\n".join(f'<article id="{article_id}">{self._tagged(fields)}</article>' for article_id, fields in summaries)
+        fields = self._summary(self._section(prompt, "Article text:"))
+        return json.dumps(fields) if response_schema else self._tagged(fields)
+
+    # Private helpers
+    def _section(self, prompt: str, header: str) -> str:
+        return prompt.split(header, 1)[-1].strip()
+
+    def _first_sentence(self, text: str) -> str:
+        match = _SENTENCE.search(text.strip())
+        return match.group(0).strip() if match else ""
+
+    def _summary(self, text: str) -> Dict[str, str]:
+        lines = [line.strip() for line in text.strip().splitlines() if line.strip()]
+        title = lines[0][:120] if lines else "unknown"
+        sentences = [sentence.strip() for sentence in _SENTENCE.findall(" ".join(lines[1:] or lines)) if sentence.strip()]
+        summary = " ".join(sentences[:3]) or "unknown"
+        words = []
+        for word in _WORD.findall(text.lower()):
+            if word not in words:
+                words.append(word)
+        date = _ISO_DATE.search(text)
+        return {
+            'tags': ', '.join(words[:3]) or 'unknown',
+            'date': date.group(1) if date else 'unknown',
+            'author': 'unknown',
+            'title': title,
+            'summary': summary,
+        }
+
+    def _tagged(self, fields: Dict[str, str]) -> str:
+        return "".join(f"<{field}>{value}</{field}>" for field, value in fields.items())
+
+
+def _gemini() -> LLMBackend:
+    # Imported lazily so other backends work without Gemini credentials or configuration
+    from .gemini_api import GeminiAPI
+    return GeminiAPI()
+
+
+BACKENDS: Dict[str, Callable[[], LLMBackend]] = {
+    'gemini': _gemini,
+    'local': LocalBackend,
+}
+
+
+def register_backend(name: str, factory: Callable[[], LLMBackend]) -> None:
+    BACKENDS[name] = factory
+
+
+def create_backend(name: Optional[str] = None) -> LLMBackend:
+    """Build the backend selected by LLM_BACKEND, with optional hedging and its concurrency limit
+
+    A positive LLM_HEDGE_AFTER_SECONDS enables hedged requests, and
+    LLM_MAX_CONCURRENCY overrides the backend's own limit. The limit wraps
+    the hedging, so time spent waiting for a slot never triggers a hedge,
+    and hedges take their own slot, so the limit holds for duplicates too.
+    """
+    name = name or os.getenv('LLM_BACKEND', 'gemini')
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown LLM backend {name}, choose one of {sorted(BACKENDS)}")
+    backend = BACKENDS[name]()
+    max_concurrency = int(os.getenv('LLM_MAX_CONCURRENCY', 0)) or backend.max_concurrency
+    hedge_after = float(os.getenv('LLM_HEDGE_AFTER_SECONDS', 0))
+    hedged = HedgedBackend(backend, hedge_after) if hedge_after > 0 else None
+    if hedged is not None:
+        backend = hedged
+    if max_concurrency:
+        limited = ConcurrencyLimitedBackend(backend, max_concurrency)
+        if hedged is not None:
+            hedged.slots = limited.slots
+        backend = limited
+    return backend
@@ -0,0 +1,127 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Playwright
+from .exceptions import BrowserCrashedError
+
+
+class _PooledPage:
+    """A browser context with a single reusable page and its navigation count"""
+
+    def __init__(self, browser: Browser, context: BrowserContext, page: Page):
+        self.browser = browser
+        self.context = context
+        self.page = page
+        self.navigations = 0
+
+
+class BrowserPool:
+    """Long-lived headless Chromium shared by all page renders of a Scraper
+
+    The browser is launched lazily on first use and kept alive until `close()`.
+    At most `max_pages` contexts are open at once; each context is recycled after
+    `max_navigations` page loads to keep memory in check. If the browser process
+    dies, it is relaunched on the next checkout.
+    """
+
+    def __init__(
+        self,
+        max_pages: int = 4,
+        max_navigations: int = 50,
+        launch_args: Optional[List[str]] = None,
+        context_options: Optional[Dict[str, Any]] = None
+    ):
+        self.max_pages = max_pages
+        self.max_navigations = max_navigations
+        self.launch_args = launch_args or []
+        self.context_options = context_options or {}
+        self.launches = 0
+        self._playwright: Optional[Playwright] = None
+        self._browser: Optional[Browser] = None
+        self._idle: List[_PooledPage] = []
+        self._lock = asyncio.Lock()
+        self._slots = asyncio.Semaphore(max_pages)
+
+    async def __aenter__(self) -> 'BrowserPool':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Page]:
+        """Check out a page, recycling or discarding its context afterwards"""
+        async with self._slots:
+            slot = await self._checkout()
+            completed = False
+            try:
+                slot.navigations += 1
+                yield slot.page
+                completed = True
+            except Exception as e:
+                if not slot.browser.is_connected():
+                    raise BrowserCrashedError(str(e)) from e
+                raise
+            finally:
+                # A failed or cancelled render may leave the page mid-navigation
+                if completed:
+                    await self._checkin(slot)
+                else:
+                    await self._close_context(slot)
+
+    async def close(self) -> None:
+        """Close all contexts, the browser and the Playwright driver"""
+        async with self._lock:
+            idle, self._idle = self._idle, []
+            for slot in idle:
+                await self._close_context(slot)
+            if self._browser is not None:
+                try:
+                    await self._browser.close()
+                except Exception as e:
+                    print(f"⚠️ Error closing browser: {str(e)}")
+                self._browser = None
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+    # Private helpers
+    async def _ensure_browser(self) -> Browser:
+        if self._browser is not None and self._browser.is_connected():
+            return self._browser
+        if self._browser is not None:
+            print("⚠️ Browser disconnected - relaunching")
+            self._idle = [slot for slot in self._idle if slot.browser.is_connected()]
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=True, args=self.launch_args)
+        self.launches += 1
+        return self._browser
+
+    async def _checkout(self) -> _PooledPage:
+        async with self._lock:
+            browser = await self._ensure_browser()
+            while self._idle:
+                slot = self._idle.pop()
+                if slot.browser is browser and not slot.page.is_closed():
+                    return slot
+                await self._close_context(slot)
+            context = await browser.new_context(**self.context_options)
+            page = await context.new_page()
+            return _PooledPage(browser, context, page)
+
+    async def _checkin(self, slot: _PooledPage) -> None:
+        if slot.navigations >= self.max_navigations or slot.page.is_closed():
+            await self._close_context(slot)
+            return
+        async with self._lock:
+            if slot.browser is self._browser:
+                self._idle.append(slot)
+                return
+        await self._close_context(slot)
+
+    async def _close_context(self, slot: _PooledPage) -> None:
+        try:
+            await slot.context.close()
+        except Exception:
+            pass  # context already gone with its browser
@@ -0,0 +1,104 @@
+import math
+import re
+from typing import Dict, List
+
+CHARS_PER_TOKEN = 4
+# Lines scoring below this (fragments such as "said" or "Advertisement") are never used to fill a budget
+MIN_LINE_SCORE = 0.3
+
+_TOKEN_PIECES = re.compile(r"\w+|[^\w\s]")
+_WORDS = re.compile(r"[^\W\d_]{2,}")
+_SENTENCE_END = re.compile(r"[.!?:;\"')\]]$")
+# Whole lines that are navigation, ad or comment-widget residue
+_BOILERPLATE_LINE = re.compile(
+    r"^(reply|share|like|report|quote|undo|advertisement|sponsored links?|promoted links?|learn more|read more|"
+    r"see more.*|see all .*|view all \d+ comments|more about .*|latest|subscribe|sign up|sign in|log in|"
+    r"\w[\w .-]{0,30} said:|said:|comment from the forums|[-=_*]{3,}|[\W\d_]*)$",
+    re.IGNORECASE
+)
+# Lines that open the comment section of a page
+_COMMENTS_HEADER = re.compile(r"^(\d+ comments?|comments?|comment from the forums|see all comments.*|view all \d+ comments)$", re.IGNORECASE)
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of text without a tokenizer
+
+    Words are counted as one token per four characters, punctuation as one
+    token each, which tracks subword tokenizers closely for English prose.
+    """
+    return sum(math.ceil(len(piece) / CHARS_PER_TOKEN) for piece in _TOKEN_PIECES.findall(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text after roughly `max_tokens` tokens, keeping its beginning"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    low, high = 0, min(len(text), max_tokens * CHARS_PER_TOKEN * 2)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(text[:middle]) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low]
+
+
+def strip_low_information(text: str) -> List[str]:
+    """Drop boilerplate lines, repeated lines and the trailing comment section"""
+    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    total_chars = sum(len(line) for line in lines)
+    kept: List[str] = []
+    seen = set()
+    kept_chars = 0
+    for line in lines:
+        # Comment threads come after the article body; stop there once most of the page is behind us
+        if _COMMENTS_HEADER.match(line) and kept_chars > total_chars * 0.3:
+            break
+        if _BOILERPLATE_LINE.match(line):
+            continue
+        key = line.lower()
+        if key in seen:
+            continue  # quoted replies and repeated widgets
+        seen.add(key)
+        kept.append(line)
+        kept_chars += len(line)
+    return kept
+
+
+def fit_to_budget(text: str, max_tokens: int) -> str:
+    """Fit text into `max_tokens`, keeping the densest lines in their original order"""
+    lines = strip_low_information(text)
+    tokens = [estimate_tokens(line) for line in lines]
+    if sum(tokens) <= max_tokens:
+        return '\n'.join(lines)
+
+    scores = [_line_score(line, line_tokens, i) for i, (line, line_tokens) in enumerate(zip(lines, tokens))]
+    ranked = sorted(range(len(lines)), key=lambda i: scores[i], reverse=True)
+    chosen: Dict[int, str] = {}
+    used = 0
+    for i in ranked:
+        if scores[i] < MIN_LINE_SCORE:
+            break
+        if used + tokens[i] <= max_tokens:
+            chosen[i] = lines[i]
+            used += tokens[i]
+        elif tokens[i] > max_tokens and used < max_tokens:
+            # A line longer than the whole budget (text without line breaks) keeps its beginning
+            chosen[i] = truncate_to_tokens(lines[i], max_tokens - used)
+            used = max_tokens
+    if not chosen:
+        return truncate_to_tokens('\n'.join(lines), max_tokens)
+    return '\n'.join(chosen[i] for i in sorted(chosen))
+
+
+def _line_score(line: str, tokens: int, position: int) -> float:
+    """Share of real words in a line, favouring full sentences and the start of the text"""
+    words = len(_WORDS.findall(line))
+    score = words / max(tokens, 1)
+    if words >= 8 and _SENTENCE_END.search(line):
+        score *= 1.5
+    elif words < 4:
+        score *= 0.25
+    if position < 5:
+        score *= 1.5  # title, byline and lede
+    return score
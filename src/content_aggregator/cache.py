@@ -0,0 +1,114 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Optional
+
+
+def cache_dir() -> str:
+    """Directory holding all persistent state, configurable with CACHE_DIR"""
+    path = os.getenv('CACHE_DIR', '.cache')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def content_key(*parts: Any) -> str:
+    """Stable hash of the given parts, used as a content-addressed cache key"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """SQLite-backed JSON cache with a TTL and LRU eviction beyond `max_entries`
+
+    Several namespaces can share one database file; limits apply per namespace.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        path: Optional[str] = None,
+        max_entries: int = 10000,
+        ttl_seconds: Optional[float] = 7 * 86400
+    ):
+        self.namespace = namespace
+        self.path = path or os.path.join(cache_dir(), 'cache.sqlite')
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_lru ON cache (namespace, accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        row = self._conn.execute(
+            "SELECT value, created_at FROM cache WHERE namespace = ? AND key = ?",
+            (self.namespace, key)
+        ).fetchone()
+        now = time.time()
+        if row is None or self._expired(row[1], now):
+            if row is not None:
+                self.delete(key)
+            self.misses += 1
+            return None
+        self._conn.execute(
+            "UPDATE cache SET accessed_at = ? WHERE namespace = ? AND key = ?",
+            (now, self.namespace, key)
+        )
+        self._conn.commit()
+        self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        now = time.time()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO cache (namespace, key, value, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+            (self.namespace, key, json.dumps(value), now, now)
+        )
+        self._evict()
+        self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        self._conn.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key))
+        self._conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        entries = self._conn.execute(
+            "SELECT COUNT(*) FROM cache WHERE namespace = ?", (self.namespace,)
+        ).fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'entries': entries}
+
+    def close(self) -> None:
+        self._conn.close()
+
+    # Private helpers
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def _evict(self) -> None:
+        if self.ttl_seconds is not None:
+            self._conn.execute(
+                "DELETE FROM cache WHERE namespace = ? AND created_at < ?",
+                (self.namespace, time.time() - self.ttl_seconds)
+            )
+        self._conn.execute("""
+            DELETE FROM cache WHERE namespace = ? AND key IN (
+                SELECT key FROM cache WHERE namespace = ?
+                ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.namespace, self.namespace, self.max_entries))
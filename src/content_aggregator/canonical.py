@@ -0,0 +1,113 @@
+import json
+import os
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, TypedDict
+from urllib.parse import urlsplit, urlunsplit
+
+
+class UrlRule(TypedDict, total=False):
+    """Per-domain canonicalization overrides, applied to the domain and its subdomains"""
+    keep_params: List[str]  # keep only these query params
+    drop_params: List[str]  # drop these on top of the tracking params
+    keep_www: bool
+    keep_fragment: bool  # for sites that route on the fragment
+
+
+TRACKING_PARAMS = re.compile(
+    r"^(utm_\w+|fbclid|gclid|dclid|msclkid|mc_cid|mc_eid|_hsenc|_hsmi|igshid|ref_src|ref_url|s_cid|cmpid|amp)$",
+    re.IGNORECASE
+)
+# /amp prefix or suffix segments and story.amp.html style AMP variants
+_AMP_PATH = re.compile(r"^/amp(?=/)|/amp/?$|\.amp(?=\.html?$)")
+_DEFAULT_PORTS = {':80', ':443'}
+
+DEFAULT_RULES: Dict[str, UrlRule] = {
+    'news.ycombinator.com': {'keep_params': ['id']},
+    'youtube.com': {'keep_params': ['v']},
+    'medium.com': {'drop_params': ['source', 'sk']},
+    'substack.com': {'drop_params': ['r', 's', 'triedRedirect']},
+    'hn.algolia.com': {'keep_fragment': True},
+}
+
+
+class UrlCanonicalizer:
+    """Maps URL variants of the same article to a single key
+
+    Schemes collapse to https, hosts are lowercased without `www.` or default
+    ports, fragments, trailing slashes, AMP variants and tracking params are
+    dropped, and the remaining query params are sorted. Results are memoized,
+    so repeated URLs across sources and runs cost a dict lookup.
+    """
+
+    def __init__(self, rules: Optional[Dict[str, UrlRule]] = None, cache_size: int = 65536):
+        self.rules = {**DEFAULT_RULES, **(rules or {})}
+        self.canonicalize = lru_cache(maxsize=cache_size)(self._canonicalize)
+        self._rule_for = lru_cache(maxsize=4096)(self._lookup_rule)
+
+    def cache_info(self):
+        return self.canonicalize.cache_info()
+
+    # Private helpers
+    def _lookup_rule(self, host: str) -> UrlRule:
+        # Most specific match wins: a.b.example.com, b.example.com, example.com
+        labels = host.split('.')
+        for i in range(len(labels) - 1):
+            rule = self.rules.get('.'.join(labels[i:]))
+            if rule is not None:
+                return rule
+        return {}
+
+    @staticmethod
+    def _keep_param(key: str, rule: UrlRule) -> bool:
+        keep = rule.get('keep_params')
+        if keep is not None:
+            return key in keep
+        return not TRACKING_PARAMS.match(key) and key not in rule.get('drop_params', ())
+
+    def _canonicalize(self, url: str) -> str:
+        parts = urlsplit(url.strip())
+        host = parts.netloc.lower().rsplit('@', 1)[-1]
+        if host[-4:] in _DEFAULT_PORTS or host[-3:] in _DEFAULT_PORTS:
+            host = host.rsplit(':', 1)[0]
+        bare_host = host[4:] if host.startswith('www.') else host
+        if bare_host.startswith('amp.'):
+            bare_host = bare_host[4:]
+        rule = self._rule_for(bare_host)
+        if rule.get('keep_www') and host.startswith('www.'):
+            bare_host = host
+
+        path = _AMP_PATH.sub('', parts.path) if 'amp' in parts.path else parts.path
+        path = path.rstrip('/') or '/'
+
+        query = ''
+        if parts.query:
+            # Params are compared and kept in their raw, still-encoded form
+            params = [
+                param for param in parts.query.split('&')
+                if param and self._keep_param(param.split('=', 1)[0], rule)
+            ]
+            query = '&'.join(sorted(params))
+
+        fragment = parts.fragment if rule.get('keep_fragment') else ''
+        scheme = 'https' if parts.scheme.lower() in ('http', 'https', '') else parts.scheme.lower()
+        return urlunsplit((scheme, bare_host, path, query, fragment))
+
+
+def _load_rules() -> Dict[str, UrlRule]:
+    path = os.getenv('URL_RULES_FILE')
+    if not path:
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+_default_canonicalizer: Optional[UrlCanonicalizer] = None
+
+
+def canonical_url(url: str) -> str:
+    """Canonical form of a URL under the default rules plus any from URL_RULES_FILE"""
+    global _default_canonicalizer
+    if _default_canonicalizer is None:
+        _default_canonicalizer = UrlCanonicalizer(_load_rules())
+    return _default_canonicalizer.canonicalize(url)
@@ -0,0 +1,94 @@
+import json
+import os
+import sqlite3
+import time
+from typing import List, Optional, Set
+from .cache import cache_dir
+from .canonical import canonical_url
+from .models import Article
+
+
+class RunCheckpoint:
+    """Durable per-run record of each pipeline stage, so an interrupted run can resume
+
+    Stores the gathered article list, the scraped content of every article and
+    the outcome of its summary in `$CACHE_DIR/checkpoints/<run_id>.sqlite`.
+    """
+
+    def __init__(self, run_id: str, path: Optional[str] = None):
+        self.run_id = run_id
+        if path is None:
+            directory = os.path.join(cache_dir(), 'checkpoints')
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f'{run_id}.sqlite')
+        self.path = path
+        self._conn = sqlite3.connect(self.path)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS gathered (
+                position INTEGER PRIMARY KEY,
+                article TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS scraped (
+                url_key TEXT PRIMARY KEY,
+                content TEXT NOT NULL,
+                scraped_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS summarized (
+                url_key TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                summarized_at REAL NOT NULL
+            );
+        """)
+        self._conn.commit()
+
+    def save_gathered(self, articles: List[Article]) -> None:
+        with self._conn:
+            self._conn.execute("DELETE FROM gathered")
+            self._conn.executemany(
+                "INSERT INTO gathered (position, article) VALUES (?, ?)",
+                [(i, json.dumps(article)) for i, article in enumerate(articles)]
+            )
+
+    def load_gathered(self) -> Optional[List[Article]]:
+        """The gathered article list, or None if gathering never completed"""
+        rows = self._conn.execute("SELECT article FROM gathered ORDER BY position").fetchall()
+        return [json.loads(row[0]) for row in rows] if rows else None
+
+    def save_scraped(self, url: str, content: str) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO scraped (url_key, content, scraped_at) VALUES (?, ?, ?)",
+            (canonical_url(url), content, time.time())
+        )
+        self._conn.commit()
+
+    def scraped_content(self, url: str) -> Optional[str]:
+        """Content scraped earlier in this run, '' if the page was empty, None if not scraped yet"""
+        row = self._conn.execute(
+            "SELECT content FROM scraped WHERE url_key = ?", (canonical_url(url),)
+        ).fetchone()
+        return row[0] if row else None
+
+    def mark_summarized(self, url: str, status: str) -> None:
+        """Record the outcome of an article's LLM stage: 'done' or 'duplicate'"""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO summarized (url_key, status, summarized_at) VALUES (?, ?, ?)",
+            (canonical_url(url), status, time.time())
+        )
+        self._conn.commit()
+
+    def summarized_urls(self, status: Optional[str] = None) -> Set[str]:
+        """Canonical URLs whose LLM stage finished, optionally only with `status`"""
+        if status is None:
+            rows = self._conn.execute("SELECT url_key FROM summarized").fetchall()
+        else:
+            rows = self._conn.execute("SELECT url_key FROM summarized WHERE status = ?", (status,)).fetchall()
+        return {row[0] for row in rows}
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def delete(self) -> None:
+        """Close and remove the checkpoint once its run has completed"""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
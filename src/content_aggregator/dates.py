@@ -0,0 +1,253 @@
+import asyncio
+import json
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+from .canonical import canonical_url
+from .http_client import HttpClient
+from .metrics import metrics
+from .models import Article
+
+_JSON_LD = re.compile(r'<script[^>]+type=["\']application/ld\+json["\'][^>]*>(.*?)</script>', re.DOTALL | re.IGNORECASE)
+_META = re.compile(r'<meta\s[^>]*>', re.IGNORECASE)
+_ATTRIBUTE = re.compile(r'([\w:-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+_TIME = re.compile(r'<time\s[^>]*datetime\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
+# /2025/01/31/, /2025-01-31-slug, /20250131/
+_URL_DATE = re.compile(r'/((?:19|20)\d{2})[/-](0[1-9]|1[0-2])[/-](0[1-9]|[12]\d|3[01])(?=[/\-_.]|$)|/((?:19|20)\d{2})(0[1-9]|1[0-2])(0[1-9]|[12]\d|3[01])(?=/|$)')
+_SITEMAP_ENTRY = re.compile(r'<(url|sitemap)>(.*?)</\1>', re.DOTALL | re.IGNORECASE)
+_LOC = re.compile(r'<loc>\s*(.*?)\s*</loc>', re.DOTALL | re.IGNORECASE)
+_LASTMOD = re.compile(r'<lastmod>\s*(.*?)\s*</lastmod>', re.DOTALL | re.IGNORECASE)
+_ISO_DAY = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+JSON_LD_DATE_KEYS = ('datePublished', 'dateCreated', 'uploadDate')
+META_DATE_KEYS = ('article:published_time', 'og:published_time', 'datepublished', 'pubdate', 'publish-date', 'date')
+SITEMAP_MAX_CHILDREN = 5
+# Sitemaps are read only this far; entries cut off at the end are ignored
+SITEMAP_MAX_BYTES = 5 * 1024 * 1024
+
+
+def parse_date(value: Any) -> Optional[int]:
+    """Unix timestamp of an ISO 8601 or RFC 2822 date, None if unreadable or implausible
+
+    A date without a time counts as the end of that day, so day-granular
+    dates are not dropped from a window that started earlier the same day.
+    """
+    if not isinstance(value, str) or not value.strip():
+        return None
+    value = value.strip()
+    parsed = None
+    try:
+        # fromisoformat only accepts a trailing Z from Python 3.11
+        parsed = datetime.fromisoformat(value[:-1] + '+00:00' if value[-1] in 'Zz' else value)
+    except ValueError:
+        try:
+            parsed = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            match = _ISO_DAY.match(value)
+            if match:
+                try:
+                    parsed = datetime.fromisoformat(match.group(0))
+                except ValueError:
+                    return None
+    if parsed is None:
+        return None
+    if len(value) == 10 and value[4] == '-':
+        parsed = parsed + timedelta(days=1, seconds=-1)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    timestamp = int(parsed.timestamp())
+    # Reject placeholders like 1970-01-01 and dates in the future
+    if not 788918400 <= timestamp <= time.time() + 86400:
+        return None
+    return timestamp
+
+
+def date_from_json_ld(html: str) -> Optional[int]:
+    """datePublished (or dateCreated, uploadDate) from JSON-LD blocks, @graph included"""
+    for match in _JSON_LD.finditer(html):
+        try:
+            data = json.loads(match.group(1).strip())
+        except json.JSONDecodeError:
+            continue
+        for node in _json_nodes(data):
+            for key in JSON_LD_DATE_KEYS:
+                timestamp = parse_date(node.get(key))
+                if timestamp:
+                    return timestamp
+    return None
+
+
+def date_from_meta(html: str) -> Optional[int]:
+    """article:published_time and similar <meta> tags, in order of preference"""
+    found: Dict[str, str] = {}
+    for tag in _META.finditer(html):
+        attributes = {name.lower(): first or second for name, first, second in _ATTRIBUTE.findall(tag.group(0))}
+        key = (attributes.get('property') or attributes.get('name') or attributes.get('itemprop') or '').lower()
+        if key in META_DATE_KEYS and attributes.get('content'):
+            found.setdefault(key, attributes['content'])
+    for key in META_DATE_KEYS:
+        timestamp = parse_date(found.get(key))
+        if timestamp:
+            return timestamp
+    return None
+
+
+def date_from_time_tag(html: str) -> Optional[int]:
+    """The first <time datetime="..."> that parses"""
+    for match in _TIME.finditer(html):
+        timestamp = parse_date(match.group(1))
+        if timestamp:
+            return timestamp
+    return None
+
+
+def date_from_url(url: str) -> Optional[int]:
+    """Dates in paths like /2025/01/31/, /2025-01-31-slug or /20250131/"""
+    match = _URL_DATE.search(urlsplit(url).path)
+    if not match:
+        return None
+    year, month, day = [group for group in match.groups() if group]
+    return parse_date(f"{year}-{month}-{day}")
+
+
+def parse_sitemap(xml: str) -> Tuple[Dict[str, int], List[Tuple[str, Optional[int]]]]:
+    """lastmod by canonical page URL, plus the child sitemaps of a sitemap index"""
+    pages: Dict[str, int] = {}
+    children: List[Tuple[str, Optional[int]]] = []
+    for match in _SITEMAP_ENTRY.finditer(xml):
+        loc = _LOC.search(match.group(2))
+        if not loc:
+            continue
+        lastmod = _LASTMOD.search(match.group(2))
+        timestamp = parse_date(lastmod.group(1)) if lastmod else None
+        if match.group(1).lower() == 'sitemap':
+            children.append((loc.group(1), timestamp))
+        elif timestamp:
+            pages[canonical_url(loc.group(1))] = timestamp
+    return pages, children
+
+
+class DateExtractor:
+    """Publication dates for pages without a feed, from the cheapest signal that has one
+
+    Checks, in order: JSON-LD, OpenGraph/meta tags, <time datetime>, the
+    URL, the site's sitemap lastmod, and only then `llm_extract` on the
+    HTML. Pages are fetched concurrently through the shared HTTP client, or
+    `fetch_html` when given, and each host's sitemap is fetched at most once.
+    """
+
+    def __init__(
+        self,
+        http: HttpClient,
+        llm_extract: Optional[Callable[[str], Awaitable[str]]] = None,
+        fetch_html: Optional[Callable[[str], Awaitable[bytes]]] = None
+    ):
+        self.http = http
+        self.llm_extract = llm_extract
+        self.fetch_html = fetch_html
+        self._sitemaps: Dict[str, asyncio.Task] = {}
+
+    async def publication_date(self, url: str) -> Optional[int]:
+        """Unix timestamp of the page's publication, None if no signal has one"""
+        with metrics.timer('dates.extract', urlsplit(url).netloc) as sample:
+            html = await self._get_html(url)
+            checks: List[Tuple[str, Callable[[str], Optional[int]], str]] = []
+            if html:
+                checks += [('json_ld', date_from_json_ld, html), ('meta', date_from_meta, html), ('time_tag', date_from_time_tag, html)]
+            checks.append(('url', date_from_url, url))
+            for method, extract, text in checks:
+                timestamp = extract(text)
+                if timestamp:
+                    sample[f'via_{method}'] = 1
+                    return timestamp
+            timestamp = (await self._sitemap(url)).get(canonical_url(url))
+            if timestamp:
+                sample['via_sitemap'] = 1
+                return timestamp
+            if html and self.llm_extract:
+                timestamp = parse_date(await self.llm_extract(html))
+                if timestamp:
+                    sample['via_llm'] = 1
+                    return timestamp
+            sample['undated'] = 1
+            return None
+
+    async def annotate(self, articles: List[Article], timeout: Optional[float] = None) -> List[Article]:
+        """Fill in `publish_at` of articles that lack one, concurrently
+
+        Lookups still running after `timeout` seconds are cancelled and leave
+        their articles undated.
+        """
+        undated = [article for article in articles if not article.get('publish_at') and article.get('url')]
+        if not undated:
+            return articles
+        tasks = [asyncio.ensure_future(self.publication_date(article['url'])) for article in undated]
+        try:
+            _, pending = await asyncio.wait(tasks, timeout=timeout)
+        finally:
+            for task in tasks:
+                task.cancel()
+        if pending:
+            print(f"⏰ Date lookups timed out after {timeout}s, leaving {len(pending)} of {len(undated)} links undated")
+        for article, task in zip(undated, tasks):
+            article['publish_at'] = None if task in pending else task.result()
+        return articles
+
+    # Private helpers
+    async def _get_html(self, url: str) -> str:
+        if self.fetch_html is not None:
+            return (await self.fetch_html(url)).decode('utf-8', errors='replace')
+        try:
+            response = await self.http.get(url)
+        except Exception as e:
+            print(f"Date lookup fetch failed for {url}: {str(e)}")
+            return ""
+        if response.status_code != 200 or 'html' not in response.headers.get('Content-Type', 'text/html'):
+            return ""
+        return response.text
+
+    async def _sitemap(self, url: str) -> Dict[str, int]:
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        if origin not in self._sitemaps:
+            self._sitemaps[origin] = asyncio.ensure_future(self._load_sitemap(origin))
+        return await asyncio.shield(self._sitemaps[origin])
+
+    async def _load_sitemap(self, origin: str) -> Dict[str, int]:
+        pages, children = await self._fetch_sitemap(f"{origin}/sitemap.xml")
+        # Only the most recently modified child sitemaps of an index are worth reading for new posts
+        children.sort(key=lambda child: child[1] or 0, reverse=True)
+        for child_pages, _ in await asyncio.gather(*(self._fetch_sitemap(loc) for loc, _ in children[:SITEMAP_MAX_CHILDREN])):
+            pages.update(child_pages)
+        return pages
+
+    async def _fetch_sitemap(self, sitemap_url: str) -> Tuple[Dict[str, int], List[Tuple[str, Optional[int]]]]:
+        chunks = []
+        size = 0
+        try:
+            async with self.http.stream(sitemap_url) as response:
+                if response.status_code != 200:
+                    return {}, []
+                async for chunk in response.aiter_bytes():
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if size >= SITEMAP_MAX_BYTES:
+                        break
+        except Exception as e:
+            print(f"Sitemap fetch failed for {sitemap_url}: {str(e)}")
+            return {}, []
+        return parse_sitemap(b''.join(chunks).decode('utf-8', errors='replace'))
+
+
+def _json_nodes(data: Any) -> Iterator[Dict[str, Any]]:
+    """Every object in a JSON-LD document, walking lists and @graph"""
+    if isinstance(data, list):
+        for item in data:
+            yield from _json_nodes(item)
+    elif isinstance(data, dict):
+        yield data
+        if '@graph' in data:
+            yield from _json_nodes(data['@graph'])
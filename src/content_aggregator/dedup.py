@@ -0,0 +1,70 @@
+import hashlib
+import re
+from collections import defaultdict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+SIMHASH_BITS = 64
+SHINGLE_WORDS = 3
+# Texts shorter than this carry too little signal to call them duplicates
+MIN_WORDS = 30
+
+_WORD = re.compile(r"\w+")
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash over word shingles, so similar texts differ in few bits"""
+    words = _WORD.findall(text.lower())
+    weights = [0] * SIMHASH_BITS
+    for i in range(max(1, len(words) - SHINGLE_WORDS + 1)):
+        shingle = ' '.join(words[i:i + SHINGLE_WORDS])
+        value = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+class NearDuplicateIndex:
+    """Online near-duplicate detector over article text
+
+    Fingerprints are split into `max_distance + 1` bands; two fingerprints
+    within `max_distance` bits must agree on at least one band, so only
+    documents sharing a band are compared.
+    """
+
+    def __init__(self, max_distance: int = 6):
+        self.max_distance = max_distance
+        self.bands = max_distance + 1
+        self._band_bits = SIMHASH_BITS // self.bands
+        self._buckets: Dict[Tuple[int, int], List[Hashable]] = defaultdict(list)
+        self._fingerprints: Dict[Hashable, int] = {}
+
+    def add(self, key: Hashable, text: str) -> Optional[Hashable]:
+        """Index text under key, or return the key of an earlier near-duplicate
+
+        Duplicates are not indexed, so every group keeps its first document as
+        the representative.
+        """
+        if len(_WORD.findall(text)) < MIN_WORDS:
+            return None
+        fingerprint = simhash(text)
+        bands = self._bands(fingerprint)
+        for band in bands:
+            for candidate in self._buckets.get(band, ()):
+                if hamming_distance(fingerprint, self._fingerprints[candidate]) <= self.max_distance:
+                    return candidate
+        self._fingerprints[key] = fingerprint
+        for band in bands:
+            self._buckets[band].append(key)
+        return None
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+    # Private helpers
+    def _bands(self, fingerprint: int) -> List[Tuple[int, int]]:
+        mask = (1 << self._band_bits) - 1
+        return [(band, fingerprint >> (band * self._band_bits) & mask) for band in range(self.bands)]
@@ -0,0 +1,117 @@
+import asyncio
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Hashable, List
+from urllib.parse import urlparse
+from .metrics import metrics
+from .models import Article
+
+
+class FairShareAllocator:
+    """Splits an article budget across sources as their results arrive
+
+    Every source is reserved an equal share of the budget, and articles
+    within that share are admitted as soon as the source reports. Articles
+    beyond it wait until a source that found fewer, failed or timed out
+    releases its unused share, which goes one article at a time to the
+    waiting source admitted the fewest so far. The total admitted never
+    exceeds the budget.
+    """
+
+    def __init__(self, budget: int, sources: List[Hashable]):
+        base, extra = divmod(budget, len(sources)) if sources else (0, 0)
+        self.reserved = {source: base + (1 if i < extra else 0) for i, source in enumerate(sources)}
+        self.pool = 0  # released budget not handed out yet
+        self.waiting: Dict[Hashable, Deque[Any]] = {}
+        self.granted: Dict[Hashable, int] = {}
+        self.admitted = 0
+
+    def offer(self, source: Hashable, articles: List[Any]) -> List[Any]:
+        """Report a source's articles, returning those admitted now"""
+        share = self.reserved.pop(source, 0)
+        admitted = list(articles[:share])
+        self.pool += share - len(admitted)
+        if len(articles) > share:
+            self.waiting[source] = deque(articles[share:])
+        self.granted[source] = len(admitted)
+        self.admitted += len(admitted)
+        return admitted + self._release()
+
+    def finish(self) -> List[Any]:
+        """Release the shares of sources that never reported and hand out what is left"""
+        self.pool += sum(self.reserved.values())
+        self.reserved.clear()
+        return self._release()
+
+    # Private helpers
+    def _release(self) -> List[Any]:
+        released = []
+        while self.pool > 0 and self.waiting:
+            source = min(self.waiting, key=self.granted.__getitem__)
+            released.append(self.waiting[source].popleft())
+            self.granted[source] += 1
+            self.pool -= 1
+            if not self.waiting[source]:
+                del self.waiting[source]
+        self.admitted += len(released)
+        return released
+
+
+class SourceDiscovery:
+    """Extracts article lists from every source concurrently and streams them out
+
+    Each source gets `source_timeout` seconds and the whole discovery
+    `total_timeout`; a source that fails or runs out of time counts as
+    having found nothing. `select` filters a source's articles (duplicates,
+    already processed) before they count against the budget.
+    """
+
+    def __init__(
+        self,
+        extract: Callable[..., Awaitable[List[Article]]],
+        budget: int,
+        source_timeout: float,
+        total_timeout: float,
+        select: Callable[[List[Article]], List[Article]] = lambda articles: articles
+    ):
+        self.extract = extract
+        self.budget = budget
+        self.source_timeout = source_timeout
+        self.total_timeout = total_timeout
+        self.select = select
+
+    async def stream(self, sources: List[Dict[str, Any]]) -> AsyncIterator[Article]:
+        """Yield admitted articles as each source finishes"""
+        allocator = FairShareAllocator(self.budget, list(range(len(sources))))
+        tasks = {asyncio.ensure_future(self._extract_source(source)): i for i, source in enumerate(sources)}
+        deadline = asyncio.get_running_loop().time() + self.total_timeout
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(
+                    tasks,
+                    timeout=max(0, deadline - asyncio.get_running_loop().time()),
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    print(f"⏰ Discovery deadline of {self.total_timeout}s reached, abandoning {len(tasks)} sources")
+                    break
+                for task in done:
+                    for article in allocator.offer(tasks.pop(task), self.select(task.result())):
+                        yield article
+            for article in allocator.finish():
+                yield article
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    # Private helpers
+    async def _extract_source(self, source: Dict[str, Any]) -> List[Article]:
+        source_url = source['source_url']
+        try:
+            with metrics.timer('discovery.source', urlparse(source_url).netloc):
+                return await asyncio.wait_for(self.extract(**source), self.source_timeout)
+        except asyncio.TimeoutError:
+            print(f"⏰ {source_url} took longer than {self.source_timeout}s - skipping")
+        except Exception as e:
+            print(f"❌ Error extracting articles from {source_url} - {str(e)}")
+        return []
@@ -0,0 +1,128 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import List, Optional, Union
+from bs4 import BeautifulSoup
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+
+Html = Union[str, bytes]
+
+NON_CONTENT_TAGS = ['script', 'style', 'nav', 'header', 'footer',
+                    'aside', 'form', 'svg', 'link', 'meta']
+CONTENT_CLASSES = ['article', 'content', 'post']
+
+
+def available_parsers() -> List[str]:
+    """Parser backends usable in this environment, fastest last"""
+    parsers = ['html.parser', 'lxml']
+    if SELECTOLAX_AVAILABLE:
+        parsers.append('selectolax')
+    return parsers
+
+
+def extract_main_text(html: Html, parser: str = 'html.parser') -> str:
+    """Strip non-content elements and return the main text of a page"""
+    if parser == 'selectolax':
+        text = _selectolax_main_text(html)
+    else:
+        text = _soup_main_text(html, parser)
+    return '\n'.join(line.strip() for line in text.split('\n') if line.strip())
+
+
+def extract_links(
+    html: Html,
+    css_selector: Optional[str] = None,
+    class_name: Optional[str] = None,
+    parser: str = 'html.parser'
+) -> List[str]:
+    """Return the raw href of every link matching the selector or class"""
+    if parser == 'selectolax':
+        tree = LexborHTMLParser(html)
+        nodes = tree.css(css_selector) if css_selector else tree.css('a[href]')
+        if not css_selector and class_name:
+            nodes = [node for node in nodes if class_name in (node.attributes.get('class') or '').split()]
+        hrefs = (node.attributes.get('href') for node in nodes)
+        return [href for href in hrefs if href]
+
+    soup = BeautifulSoup(html, parser)
+    links = soup.find_all('a', href=True)
+    if css_selector:
+        links = soup.select(css_selector)
+    elif class_name:
+        links = [link for link in links if class_name in link.get('class', [])]
+    return [link['href'] for link in links if link.get('href')]
+
+
+class HtmlExtractor:
+    """Runs HTML parsing in a process pool so large pages don't stall the event loop
+
+    With `max_workers=0` parsing runs inline, which is cheaper for small runs and tests.
+    """
+
+    def __init__(self, parser: Optional[str] = None, max_workers: Optional[int] = None):
+        if parser and parser not in available_parsers():
+            raise ValueError(f"Unsupported HTML parser {parser}, choose one of {available_parsers()}")
+        self.parser = parser or available_parsers()[-1]
+        self.max_workers = os.cpu_count() if max_workers is None else max_workers
+        self._pool: Optional[Executor] = None
+
+    async def main_text(self, html: Html) -> str:
+        return await self._run(extract_main_text, html, self.parser)
+
+    async def links(self, html: Html, css_selector: Optional[str] = None, class_name: Optional[str] = None) -> List[str]:
+        return await self._run(extract_links, html, css_selector, class_name, self.parser)
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    # Private helpers
+    async def _run(self, func, *args):
+        if not self.max_workers:
+            return func(*args)
+        if self._pool is None:
+            # Forking a process with a running event loop and its threads is unsafe
+            start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context(start_method))
+        return await asyncio.get_running_loop().run_in_executor(self._pool, func, *args)
+
+
+def _soup_main_text(html: Html, parser: str) -> str:
+    soup = BeautifulSoup(html, parser)
+    # Remove non-content elements
+    for tag in soup(NON_CONTENT_TAGS):
+        tag.decompose()
+    # Find main content using multiple heuristics
+    main_content = (
+        soup.find('article') or
+        soup.find('main') or
+        soup.find('div', role='main') or
+        soup.find(class_=CONTENT_CLASSES) or
+        soup.body
+    )
+    if main_content is None:
+        return ""
+    return main_content.get_text(separator='\n', strip=True)
+
+
+def _selectolax_main_text(html: Html) -> str:
+    tree = LexborHTMLParser(html)
+    for node in tree.css(', '.join(NON_CONTENT_TAGS)):
+        node.decompose()
+    main_content = (
+        tree.css_first('article') or
+        tree.css_first('main') or
+        tree.css_first('div[role="main"]') or
+        tree.css_first(', '.join(f'.{name}' for name in CONTENT_CLASSES)) or
+        tree.body
+    )
+    if main_content is None:
+        return ""
+    return main_content.text(separator='\n', strip=True)
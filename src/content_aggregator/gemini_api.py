@@ -3,22 +3,29 @@ import os
 import google.generativeai as genai
 from dotenv import load_dotenv
 from google.api_core.exceptions import ResourceExhausted
+from .backends import LLMBackend
 from .exceptions import RateLimitExceededError
+from .metrics import metrics
 from urllib3.util import Retry
 
 
 load_dotenv()
 
-class GeminiAPI:
+class GeminiAPI(LLMBackend):
+    """Client for interacting with Gemini API with model management"""
+
     RETRY_AFTER_DEFAULT = 15
+    max_concurrency = 8
     
-    """Client for interacting with Gemini API with model management"""
     def __init__(self):
         self._validate_env_vars()
         genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
+        self.model_names: Dict[str, str] = {
+            'summarize': os.getenv('GEMINI_MODEL_SUMMARIZE'),
+            'date_extract': os.getenv('GEMINI_MODEL_DATE_EXTRACT')
+        }
         self.models: Dict[str, genai.GenerativeModel] = {
-            'summarize': genai.GenerativeModel(os.getenv('GEMINI_MODEL_SUMMARIZE')),
-            'date_extract': genai.GenerativeModel(os.getenv('GEMINI_MODEL_DATE_EXTRACT'))
+            key: genai.GenerativeModel(name) for key, name in self.model_names.items()
         }
     
     async def generate_content(
@@ -26,18 +33,28 @@ class GeminiAPI:
         model_key: str, 
         prompt: str, 
         temperature: float = 0.2,
-        max_tokens: Optional[int] = None
+        max_tokens: Optional[int] = None,
+        response_schema: Optional[dict] = None
     ) -> str:
-        """Generate content asynchronously with specified model and parameters"""
+        """Generate content asynchronously with specified model and parameters
+
+        A `response_schema` switches the model to JSON mode constrained to that schema.
+        """
         try:
             self._log_debug(f"Generating content with model: {model_key}")
-            response = await self.models[model_key].generate_content_async(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=temperature,
-                    max_output_tokens=max_tokens
+            with metrics.timer('llm.generate', model_key) as sample:
+                response = await self.models[model_key].generate_content_async(
+                    prompt,
+                    generation_config=genai.types.GenerationConfig(
+                        temperature=temperature,
+                        max_output_tokens=max_tokens,
+                        response_mime_type='application/json' if response_schema else None,
+                        response_schema=response_schema
+                    )
                 )
-            )
+                usage = getattr(response, 'usage_metadata', None)
+                sample['tokens_in'] = getattr(usage, 'prompt_token_count', 0) or 0
+                sample['tokens_out'] = getattr(usage, 'candidates_token_count', 0) or 0
             self._log_debug(f"Response: {response.text}")
             return response.text
         except ResourceExhausted as e:
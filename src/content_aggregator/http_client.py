@@ -0,0 +1,87 @@
+import asyncio
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+from urllib.parse import urlsplit
+import httpx
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class HttpClient:
+    """Shared async HTTP client with keep-alive pooling and in-flight limits
+
+    One connection pool serves every feed, index page and PDF download of a
+    Scraper. HTTP/2 is negotiated when the `h2` package is installed. Requests
+    are bounded globally by `max_in_flight` and per host by
+    `max_connections_per_host`.
+    """
+
+    def __init__(
+        self,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = 20,
+        max_connections: int = 100,
+        max_connections_per_host: int = 6,
+        max_in_flight: int = 32,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.headers = headers or {}
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.transport = transport
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self._host_slots: Dict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(self.max_connections_per_host)
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def __aenter__(self) -> 'HttpClient':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def get(self, url: str, headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = None) -> httpx.Response:
+        """GET a URL and read the full body"""
+        async with self._slot(url):
+            return await self._get_client().get(url, headers=headers, timeout=timeout or self.timeout)
+
+    @asynccontextmanager
+    async def stream(self, url: str, headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = None) -> AsyncIterator[httpx.Response]:
+        """GET a URL without reading the body, for use with `response.aiter_bytes()`"""
+        async with self._slot(url):
+            async with self._get_client().stream('GET', url, headers=headers, timeout=timeout or self.timeout) as response:
+                yield response
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    # Private helpers
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=self.headers,
+                http2=HTTP2_AVAILABLE,
+                follow_redirects=True,
+                transport=self.transport,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                )
+            )
+        return self._client
+
+    @asynccontextmanager
+    async def _slot(self, url: str) -> AsyncIterator[None]:
+        async with self._in_flight:
+            async with self._host_slots[urlsplit(url).netloc]:
+                yield
@@ -1,21 +1,90 @@
 from dotenv import load_dotenv
 from datetime import datetime
 import asyncio
-from .gemini_api import GeminiAPI
+import hashlib
+import os
+from .cache import DiskCache, content_key
+from .backends import LLMBackend, create_backend
+from .budget import CHARS_PER_TOKEN, estimate_tokens, fit_to_budget, truncate_to_tokens
+from .scheduler import LLMScheduler, PRIORITY_HIGH, PRIORITY_NORMAL
 import re
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+from .exceptions import RateLimitExceededError
+from .metrics import metrics
 from .models import Article
+from .structured import BATCH_SCHEMA, SUMMARY_SCHEMA, parse_batch, parse_summary
 
 # Load environment variables
 load_dotenv()
 
+# Step 6 of the summarize prompts, for tagged answers or JSON mode
+_TAGGED_FORMAT = """6. Present your findings strictly following the specified format:
+<tags>[Tags]</tags>
+<date>[Publication Date]</date>
+<author>[Author]</author>
+<title>[Title]</title>
+<summary>[Summary]</summary>"""
+_JSON_FORMAT = '6. Present your findings as a JSON object with the string fields "tags", "date", "author", "title" and "summary"'
+_BATCH_TAGGED_FORMAT = """6. Present your findings for every article strictly following the specified format:
+<article id="[Id]">
+<tags>[Tags]</tags>
+<date>[Publication Date]</date>
+<author>[Author]</author>
+<title>[Title]</title>
+<summary>[Summary]</summary>
+</article>"""
+_BATCH_JSON_FORMAT = (
+    '6. Present your findings as a JSON array with one object per article, '
+    'holding its integer "id" and the string fields "tags", "date", "author", "title" and "summary"'
+)
+
 class LLMProcessor:
     """Handles all LLM processing tasks including summarization and date extraction"""
     
     UNKNOWN = ""
+    NO_SUMMARY = 'No summary generated'
+    EMPTY_CONTENT = 'empty content'
+    # Bump whenever the summarize prompt changes so cached summaries are not reused
+    PROMPT_VERSION = 1
     
-    def __init__(self):
-        self.gemini = GeminiAPI()
+    def __init__(self, backend: Optional[LLMBackend] = None):
+        # Selected by LLM_BACKEND unless one is passed in
+        self.backend = backend or create_backend()
+        self.scheduler = LLMScheduler(
+            self.backend,
+            requests_per_minute=int(os.getenv('GEMINI_RPM', 15)),
+            tokens_per_minute=int(os.getenv('GEMINI_TPM', 1_000_000)),
+            max_retries=int(os.getenv('GEMINI_MAX_RETRIES', 5)),
+            base_delay=self.backend.RETRY_AFTER_DEFAULT
+        )
+        # Input tokens of article text or HTML sent per call, by model key
+        self.input_budget = {
+            'summarize': int(os.getenv('SUMMARIZE_INPUT_TOKENS', 4000)),
+            'date_extract': int(os.getenv('DATE_EXTRACT_INPUT_TOKENS', 2000))
+        }
+        self.batch_config = {
+            'max_posts': int(os.getenv('LLM_BATCH_SIZE', 8)),
+            'token_budget': int(os.getenv('LLM_BATCH_TOKENS', 6000)),
+            'short_post_tokens': int(os.getenv('LLM_BATCH_SHORT_POST_TOKENS', 1500))
+        }
+        self.executive_config = {
+            'chunk_tokens': int(os.getenv('EXECUTIVE_CHUNK_TOKENS', 8000)),
+            'max_levels': 4
+        }
+        # Ask for JSON constrained by a response schema instead of tagged text
+        self.structured_output = os.getenv('LLM_STRUCTURED_OUTPUT', 'true').lower() == 'true'
+        # Chunk and final executive summaries, so a rerun over the same summaries is free
+        self.executive_cache = DiskCache(namespace='executive_summaries', max_entries=1000)
+        self.summary_cache = DiskCache(
+            namespace='summaries',
+            max_entries=int(os.getenv('SUMMARY_CACHE_MAX_ENTRIES', 10000)),
+            ttl_seconds=int(os.getenv('SUMMARY_CACHE_TTL_SECONDS', 7 * 86400))
+        )
+
+    @property
+    def max_input_chars(self) -> int:
+        """Raw text worth extracting for one article, leaving room for boilerplate that gets stripped"""
+        return self.input_budget['summarize'] * CHARS_PER_TOKEN * 2
 
     # Public interface
     async def summarize_post(self, text: str, source_url: str) -> Article:
@@ -23,41 +92,87 @@ class LLMProcessor:
         if not text.strip():
             return self._empty_response(source_url)
             
-        truncated = text[:15000] if text else ""
+        truncated = fit_to_budget(text, self.input_budget['summarize'])
+        cache_key = self._summary_cache_key(truncated)
+        cached = self._cached_summary(cache_key, source_url)
+        if cached is not None:
+            return cached
+        return await self._summarize_uncached(truncated, source_url, cache_key)
+
+    async def summarize_many(self, posts: List[Tuple[str, str]]) -> List[Article]:
+        """Summarize (text, source_url) posts, packing short uncached ones into shared requests
+
+        Raises RateLimitExceededError once the scheduler has spent its retries,
+        so the caller can re-queue the posts.
+        """
+        results: Dict[int, Article] = {}
+        pending = []
+        for i, (text, source_url) in enumerate(posts):
+            if not text.strip():
+                results[i] = self._empty_response(source_url)
+                continue
+            truncated = fit_to_budget(text, self.input_budget['summarize'])
+            cache_key = self._summary_cache_key(truncated)
+            cached = self._cached_summary(cache_key, source_url)
+            if cached is None:
+                pending.append((i, truncated, source_url, cache_key))
+            else:
+                results[i] = cached
+        
+        async def run_batch(batch):
+            summaries = await self._summarize_batch([(truncated, url, key) for _, truncated, url, key in batch])
+            for (i, *_), summary in zip(batch, summaries):
+                results[i] = summary
+        
+        await asyncio.gather(*(run_batch(batch) for batch in self._plan_batches(pending)))
+        return [results[i] for i in range(len(posts))]
+
+    def has_summary(self, article: Article) -> bool:
+        """Whether a summarize result holds a summary rather than a failure placeholder"""
+        return article.get('summary') not in (None, self.NO_SUMMARY, self.EMPTY_CONTENT)
+
+    async def summarize_all(self, summaries: list) -> str:
+        """Generate executive summary from multiple summaries
+
+        Summaries that don't fit one prompt are chunked to a token budget,
+        condensed concurrently and reduced level by level until they do.
+        """
+        summaries = [summary for summary in summaries if summary]
+        if len(summaries) == 0:
+            return ""
+        with metrics.timer('llm.executive'):
+            return await self._reduce_summaries(summaries)
+
+    async def extract_date_llm(self, html_content: str) -> str:
+        """Extract publication date using original prompt structure"""
+        prompt = """Analyze this HTML and find the publication date in YYYY-MM-DD format.
+    Look for dates in article headers, meta tags, or visible date elements, exclude dates in the article body
+    Return ONLY the date in ISO format within curly braces or 'null' if not found.
     
-        prompt = """You are an AI assistant specialized in summarizing and extracting metadata from articles. 
-Your task is to summarize the article and extract the publication date.
-Instructions:
-1. Carefully read the entire blog text provided.
-2. Extract the publication date as [Publication Date], if not found, return unknown 
-3. Extract the author as [Author], if not found, return unknown
-4. Extract the title as [Title], if not found, return unknown
-5. Summarize article in 3-5 sentences as [Summary] and tags as [Tags] in lowercase, no special characters, comma separated
-6. Present your findings strictly following the specified format:
-<tags>[Tags]</tags>
-<date>[Publication Date]</date>
-<author>[Author]</author>
-<title>[Title]</title>
-<summary>[Summary]</summary>
+    HTML Content:
+    {content}""".format(content=truncate_to_tokens(html_content, self.input_budget['date_extract']))
 
-Article text:
-{text}""".format(text=truncated)
-                    
         try:
-            response = await self.gemini.generate_content(
-                model_key='summarize',
+            response = await self.scheduler.generate_content(
+                model_key='date_extract',
                 prompt=prompt,
-                temperature=0.1
+                temperature=0.0,
+                max_tokens=100,
+                priority=PRIORITY_HIGH
             )
-            return self._parse_response(response, source_url)
+            return response.strip('{}').strip() if response else 'null'
         except Exception as e:
-            print(f"Summarization error: {str(e)}")
-            return self._empty_response(source_url)
+            print(f"Date extraction failed: {str(e)}")
+            return 'null'
 
-    async def summarize_all(self, summaries: list) -> str:
-        """Generate executive summary from multiple summaries"""
-        if len(summaries) == 0:
-            return ""
+    # Private helpers
+    async def _reduce_summaries(self, summaries: List[str]) -> str:
+        for level in range(self.executive_config['max_levels']):
+            chunks = self._chunk_by_tokens(summaries, self.executive_config['chunk_tokens'])
+            if len(chunks) == 1:
+                break
+            print(f"🗂️ Condensing {len(summaries)} summaries in {len(chunks)} chunks (level {level + 1})")
+            summaries = list(await asyncio.gather(*(self._condense_chunk(chunk) for chunk in chunks)))
         
         combined = "\n".join(summaries)
         prompt = """Generate an executive summary under 500 words from these key points:
@@ -81,54 +196,195 @@ Article text:
         """.format(text=combined)
 
         try:
-            return await self.gemini.generate_content(
+            return await self._cached_generate(prompt, temperature=0.3)
+        except Exception as e:
+            print(f"Summary aggregation failed: {str(e)}")
+            return combined
+
+    def _chunk_by_tokens(self, texts: List[str], token_budget: int) -> List[List[str]]:
+        """Split texts into consecutive chunks whose estimated size fits the token budget"""
+        chunks: List[List[str]] = [[]]
+        tokens = 0
+        for text in texts:
+            text_tokens = estimate_tokens(text) + 1
+            if chunks[-1] and tokens + text_tokens > token_budget:
+                chunks.append([])
+                tokens = 0
+            chunks[-1].append(text)
+            tokens += text_tokens
+        return chunks
+
+    async def _condense_chunk(self, chunk: List[str]) -> str:
+        """Map step of the executive summary: condense a chunk of summaries into key points"""
+        prompt = """Condense these article summaries into at most 10 bullet points of key points.
+        Keep concrete numbers, named sources, contradictions between sources and memorable quotes.
+        
+        Summaries:
+        {text}
+        """.format(text="\n".join(chunk))
+        try:
+            return await self._cached_generate(prompt, temperature=0.2)
+        except Exception as e:
+            print(f"⚠️ Condensing a chunk of {len(chunk)} summaries failed, keeping them as is: {str(e)}")
+            return "\n".join(chunk)
+
+    async def _cached_generate(self, prompt: str, temperature: float) -> str:
+        """Executive summary LLM call whose answer is cached by prompt content"""
+        cache_key = content_key(self.backend.model_names['summarize'], self.PROMPT_VERSION, hashlib.sha256(prompt.encode('utf-8')).hexdigest())
+        cached = self.executive_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        response = await self.scheduler.generate_content(
+            model_key='summarize',
+            prompt=prompt,
+            temperature=temperature,
+            priority=PRIORITY_HIGH
+        )
+        self.executive_cache.set(cache_key, response)
+        return response
+
+    def _summary_cache_key(self, truncated: str) -> str:
+        return content_key(
+            self.backend.model_names['summarize'],
+            self.PROMPT_VERSION,
+            hashlib.sha256(truncated.encode('utf-8')).hexdigest()
+        )
+
+    def _cached_summary(self, cache_key: str, source_url: str) -> Optional[Article]:
+        cached = self.summary_cache.get(cache_key)
+        if cached is None:
+            return None
+        return self._to_article(cached, source_url)
+
+    async def _summarize_uncached(self, truncated: str, source_url: str, cache_key: str) -> Article:
+        prompt = """You are an AI assistant specialized in summarizing and extracting metadata from articles. 
+Your task is to summarize the article and extract the publication date.
+Instructions:
+1. Carefully read the entire blog text provided.
+2. Extract the publication date as [Publication Date], if not found, return unknown 
+3. Extract the author as [Author], if not found, return unknown
+4. Extract the title as [Title], if not found, return unknown
+5. Summarize article in 3-5 sentences as [Summary] and tags as [Tags] in lowercase, no special characters, comma separated
+{format}
+
+Article text:
+{text}""".format(format=_JSON_FORMAT if self.structured_output else _TAGGED_FORMAT, text=truncated)
+                    
+        try:
+            response = await self.scheduler.generate_content(
                 model_key='summarize',
                 prompt=prompt,
-                temperature=0.3
+                temperature=0.1,
+                priority=PRIORITY_NORMAL,
+                response_schema=SUMMARY_SCHEMA if self.structured_output else None
             )
+            result = self._parse_response(response, source_url)
+            if result['summary'] != self.NO_SUMMARY:
+                self.summary_cache.set(cache_key, result)
+            return result
+        except RateLimitExceededError:
+            # The scheduler's retries are spent, leave re-queueing to the caller
+            raise
         except Exception as e:
-            print(f"Summary aggregation failed: {str(e)}")
-            return "\n".join(summaries)
+            print(f"Summarization error: {str(e)}")
+            return self._empty_response(source_url)
 
-    async def extract_date_llm(self, html_content: str) -> str:
-        """Extract publication date using original prompt structure"""
-        prompt = """Analyze this HTML and find the publication date in YYYY-MM-DD format.
-    Look for dates in article headers, meta tags, or visible date elements, exclude dates in the article body
-    Return ONLY the date in ISO format within curly braces or 'null' if not found.
-    
-    HTML Content:
-    {content}""".format(content=html_content[:8000])
+    def _plan_batches(self, pending: list) -> List[list]:
+        """Group short posts into batches within the token budget, long posts go alone"""
+        batches: List[list] = []
+        current: list = []
+        current_tokens = 0
+        for item in pending:
+            tokens = estimate_tokens(item[1])
+            if tokens > self.batch_config['short_post_tokens'] or self.batch_config['max_posts'] <= 1:
+                batches.append([item])
+                continue
+            if current and (current_tokens + tokens > self.batch_config['token_budget'] or len(current) >= self.batch_config['max_posts']):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(item)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _summarize_batch(self, posts: List[Tuple[str, str, str]]) -> List[Article]:
+        """Summarize (truncated, source_url, cache_key) posts in one request
+
+        Posts missing from the response, or whose block fails to parse, are
+        summarized individually instead.
+        """
+        if len(posts) == 1:
+            return [await self._summarize_uncached(*posts[0])]
+        
+        articles = "\n\n".join(
+            f"=== Article {i} ===\n{truncated}" for i, (truncated, _, _) in enumerate(posts, 1)
+        )
+        prompt = """You are an AI assistant specialized in summarizing and extracting metadata from articles. 
+Your task is to summarize each of the {count} articles below and extract their publication dates.
+Instructions:
+1. Carefully read the entire text of every article, each one starts with a line "=== Article [Id] ===".
+2. Extract the publication date as [Publication Date], if not found, return unknown 
+3. Extract the author as [Author], if not found, return unknown
+4. Extract the title as [Title], if not found, return unknown
+5. Summarize each article in 3-5 sentences as [Summary] and tags as [Tags] in lowercase, no special characters, comma separated
+{format}
 
+Articles:
+{articles}""".format(
+            count=len(posts),
+            format=_BATCH_JSON_FORMAT if self.structured_output else _BATCH_TAGGED_FORMAT,
+            articles=articles
+        )
+        
+        blocks: Dict[int, Dict[str, str]] = {}
         try:
-            response = await self.gemini.generate_content(
-                model_key='date_extract',
+            response = await self.scheduler.generate_content(
+                model_key='summarize',
                 prompt=prompt,
-                temperature=0.0,
-                max_tokens=100
+                temperature=0.1,
+                priority=PRIORITY_NORMAL,
+                response_schema=BATCH_SCHEMA if self.structured_output else None
             )
-            return response.strip('{}').strip() if response else 'null'
+            blocks = parse_batch(response)
+        except RateLimitExceededError:
+            raise
         except Exception as e:
-            print(f"Date extraction failed: {str(e)}")
-            return 'null'
+            print(f"Batch summarization error: {str(e)}, falling back to single requests")
+        
+        results: Dict[int, Article] = {}
+        fallbacks = []
+        for i, (truncated, source_url, cache_key) in enumerate(posts):
+            result = self._to_article(blocks[i + 1], source_url) if i + 1 in blocks else None
+            if result is None or result['summary'] == self.NO_SUMMARY:
+                fallbacks.append(i)
+                continue
+            self.summary_cache.set(cache_key, result)
+            results[i] = result
+        
+        if fallbacks:
+            print(f"⚠️ {len(fallbacks)} of {len(posts)} batched articles failed to parse, summarizing them individually")
+            singles = await asyncio.gather(*(self._summarize_uncached(*posts[i]) for i in fallbacks))
+            for i, result in zip(fallbacks, singles):
+                results[i] = result
+        return [results[i] for i in range(len(posts))]
 
-    # Private helpers
     def _parse_response(self, response: str, source_url: str) -> Article:
-        """Parse the XML-like response format"""
-        title_match = re.search(f'<title>(.*?)</title>', response, re.DOTALL)
-        author_match = re.search(f'<author>(.*?)</author>', response, re.DOTALL)
-        date_match = re.search(f'<date>(.*?)</date>', response, re.DOTALL)
-        summary_match = re.search(f'<summary>(.*?)</summary>', response, re.DOTALL)
-        tags_match = re.search(f'<tags>(.*?)</tags>', response, re.DOTALL)
-        
+        """Parse a JSON or XML-like response, keeping whatever fields are readable"""
+        return self._to_article(parse_summary(response), source_url)
+
+    def _to_article(self, fields: Dict[str, str], source_url: str) -> Article:
+        """Article from parsed fields, only a missing summary counts as a failed parse"""
         return Article(
             url=source_url,
-            title=title_match.group(1) if title_match else self.UNKNOWN,
-            author=author_match.group(1) if author_match else self.UNKNOWN,
+            title=fields.get('title', self.UNKNOWN),
+            author=fields.get('author', self.UNKNOWN),
             publish_at=None,  # Will be populated during processing
-            tags=tags_match.group(1) if tags_match else self.UNKNOWN,
-            date=date_match.group(1) if date_match else self.UNKNOWN,
-            summary=summary_match.group(1) if summary_match else 'No summary generated',
-            timestamp=datetime.now().isoformat()
+            tags=fields.get('tags', self.UNKNOWN),
+            date=fields.get('date', self.UNKNOWN),
+            summary=fields.get('summary') or self.NO_SUMMARY,
+            timestamp=datetime.now().isoformat(),
+            sources=[]
         )
 
     def _extract_tag(self, text: str, tag: str) -> str:
@@ -144,8 +400,9 @@ Article text:
             publish_at=None,
             tags=self.UNKNOWN,
             date=self.UNKNOWN,
-            summary="empty content",
-            timestamp=datetime.now().isoformat()
+            summary=self.EMPTY_CONTENT,
+            timestamp=datetime.now().isoformat(),
+            sources=[]
         )
 
 async def main():
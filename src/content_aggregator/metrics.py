@@ -0,0 +1,122 @@
+import json
+import math
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
+
+PROMETHEUS_PREFIX = 'content_aggregator'
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of values, 0 for no values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class Metrics:
+    """Wall time and counters per pipeline stage and per domain for one run
+
+    Stages are dotted names such as `scrape.render` or `llm.generate`; the
+    domain is the host for network stages and the model key for LLM calls.
+    Counters recorded alongside a timing (bytes, tokens_in, tokens_out,
+    errors) are summed.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.started_at = time.time()
+        self._durations: Dict[Tuple[str, str], List[float]] = defaultdict(list)
+        self._counters: Dict[Tuple[str, str], Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+
+    @contextmanager
+    def timer(self, stage: str, domain: str = '') -> Iterator[Dict[str, float]]:
+        """Time a block; counters set on the yielded dict are recorded with it"""
+        counters: Dict[str, float] = {}
+        start = time.perf_counter()
+        try:
+            yield counters
+        except BaseException:
+            counters['errors'] = counters.get('errors', 0) + 1
+            raise
+        finally:
+            self.record(stage, time.perf_counter() - start, domain, **counters)
+
+    def record(self, stage: str, seconds: float, domain: str = '', **counters: float) -> None:
+        self._durations[(stage, domain)].append(seconds)
+        for name, amount in counters.items():
+            self._counters[(stage, domain)][name] += amount
+
+    def summary(self) -> Dict[str, Any]:
+        """Per-stage statistics with a per-domain breakdown"""
+        stages: Dict[str, Dict[str, Any]] = {}
+        by_stage: Dict[str, List[str]] = defaultdict(list)
+        for stage, domain in self._durations:
+            by_stage[stage].append(domain)
+        for stage, domains in sorted(by_stage.items()):
+            durations = [seconds for domain in domains for seconds in self._durations[(stage, domain)]]
+            counters: Dict[str, float] = defaultdict(float)
+            for domain in domains:
+                for name, amount in self._counters[(stage, domain)].items():
+                    counters[name] += amount
+            stages[stage] = {
+                **self._stats(durations, counters),
+                'domains': {
+                    domain: self._stats(self._durations[(stage, domain)], self._counters[(stage, domain)])
+                    for domain in sorted(domains) if domain
+                }
+            }
+        return {'started_at': self.started_at, 'elapsed_s': time.time() - self.started_at, 'stages': stages}
+
+    def write_json(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def to_prometheus(self) -> str:
+        """Per-stage metrics in the Prometheus text exposition format
+
+        Domains are left out to keep label cardinality bounded; they are in the JSON report.
+        """
+        stages = self.summary()['stages']
+        seconds = f'{PROMETHEUS_PREFIX}_stage_seconds'
+        lines = [f'# TYPE {seconds} summary']
+        for stage, stats in stages.items():
+            for quantile, key in (('0.5', 'p50_s'), ('0.95', 'p95_s'), ('1', 'max_s')):
+                lines.append(f'{seconds}{{stage="{stage}",quantile="{quantile}"}} {stats[key]:.6f}')
+            lines.append(f'{seconds}_sum{{stage="{stage}"}} {stats["total_s"]:.6f}')
+            lines.append(f'{seconds}_count{{stage="{stage}"}} {stats["count"]}')
+        for counter in ('bytes', 'tokens_in', 'tokens_out', 'errors'):
+            name = f'{PROMETHEUS_PREFIX}_{counter}_total'
+            lines.append(f'# TYPE {name} counter')
+            for stage, stats in stages.items():
+                if counter in stats:
+                    lines.append(f'{name}{{stage="{stage}"}} {stats[counter]:g}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str) -> None:
+        # Written then renamed so a textfile collector never reads half a file
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+    # Private helpers
+    def _stats(self, durations: List[float], counters: Dict[str, float]) -> Dict[str, float]:
+        return {
+            'count': len(durations),
+            'total_s': sum(durations),
+            'p50_s': percentile(durations, 0.5),
+            'p95_s': percentile(durations, 0.95),
+            'max_s': max(durations, default=0.0),
+            **counters
+        }
+
+
+# Shared by every component of a run
+metrics = Metrics()
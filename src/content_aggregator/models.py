@@ -1,4 +1,4 @@
-from typing import TypedDict, Optional
+from typing import Any, List, TypedDict, Optional
 
 class Article(TypedDict):
     """Type definition for processed article data"""
@@ -9,4 +9,12 @@ class Article(TypedDict):
     tags: Optional[str]
     date: Optional[str]  # ISO date string
     summary: Optional[str]
-    timestamp: Optional[str]  # Processing timestamp 
\ No newline at end of file
+    timestamp: Optional[str]  # Processing timestamp
+    sources: Optional[List[str]]  # URLs of every near-duplicate copy, representative first
+
+class FetchedPage(TypedDict):
+    """Downloaded article waiting for text extraction"""
+    url: str
+    kind: str  # 'html' or 'pdf'
+    body: Any  # HTML text or bytes, or a file object holding the PDF
+    rendered: bool  # HTML came from the browser 
\ No newline at end of file
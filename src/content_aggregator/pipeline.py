@@ -0,0 +1,112 @@
+import asyncio
+from typing import Any, AsyncIterable, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Union
+from .metrics import metrics
+from .utils import as_async_iter
+
+# A stage handler takes one item, or a list of them for batched stages, and returns
+# what goes on to the next stage; None means the item leaves the pipeline there
+Handler = Callable[[Any], Awaitable[Any]]
+
+
+class Stage:
+    """One step of a Pipeline: `workers` tasks running `handler` over a bounded input queue
+
+    With a `batch_size` the handler gets and returns lists: a worker takes
+    whatever else is already queued, up to `batch_size` items.
+    """
+
+    def __init__(self, name: str, handler: Handler, workers: int = 1, queue_size: int = 0, batch_size: Optional[int] = None):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.batch_size = batch_size
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+
+class Pipeline:
+    """Stages connected by bounded queues, so each stage applies backpressure to the one before
+
+    Items fed to `run` enter the first stage; whatever a handler returns is
+    put on the next stage's queue, waiting while it is full. A handler can
+    send an item back to any stage with `submit`, e.g. to retry it. `run`
+    returns once every item has left the pipeline.
+    """
+
+    def __init__(self, stages: List[Stage]):
+        self.stages = stages
+        self._by_name: Dict[str, Stage] = {stage.name: stage for stage in stages}
+        self._pending = 0
+        self._all_done = asyncio.Event()
+        self._resubmissions: Set[asyncio.Task] = set()
+
+    def submit(self, stage_name: str, item: Any) -> None:
+        """Queue an extra item on a stage without waiting, for retries from later stages"""
+        self._pending += 1
+        queue = self._by_name[stage_name].queue
+        try:
+            queue.put_nowait(item)
+        except asyncio.QueueFull:
+            # Waiting here could deadlock with the stage we are sending back to
+            task = asyncio.create_task(queue.put(item))
+            self._resubmissions.add(task)
+            task.add_done_callback(self._resubmissions.discard)
+
+    async def run(self, items: Union[Iterable[Any], AsyncIterable[Any]]) -> None:
+        """Feed items into the first stage and wait for all of them to finish"""
+        self._pending = 1  # the feeder's own slot, released once every item is queued
+        self._all_done.clear()
+        feed = asyncio.create_task(self._feed(items))
+        workers = [
+            asyncio.create_task(self._work(stage, self._next(position)))
+            for position, stage in enumerate(self.stages)
+            for _ in range(stage.workers)
+        ]
+        try:
+            await self._all_done.wait()
+            # Re-raise a failure of the item source rather than returning as if complete
+            await feed
+        finally:
+            feed.cancel()
+            for task in [*workers, *self._resubmissions]:
+                task.cancel()
+            await asyncio.gather(feed, *workers, *self._resubmissions, return_exceptions=True)
+
+    # Private helpers
+    def _next(self, position: int) -> Optional[Stage]:
+        return self.stages[position + 1] if position + 1 < len(self.stages) else None
+
+    def _finish(self) -> None:
+        self._pending -= 1
+        if self._pending == 0:
+            self._all_done.set()
+
+    async def _feed(self, items: Union[Iterable[Any], AsyncIterable[Any]]) -> None:
+        try:
+            async for item in as_async_iter(items):
+                self._pending += 1
+                await self.stages[0].queue.put(item)
+        finally:
+            self._finish()
+
+    async def _work(self, stage: Stage, next_stage: Optional[Stage]) -> None:
+        while True:
+            batch = [await stage.queue.get()]
+            while len(batch) < (stage.batch_size or 1) and not stage.queue.empty():
+                batch.append(stage.queue.get_nowait())
+            try:
+                with metrics.timer(f'pipeline.{stage.name}'):
+                    results = await stage.handler(batch if stage.batch_size else batch[0])
+                if not stage.batch_size:
+                    results = [results]
+            except Exception as e:
+                print(f"❌ {stage.name} stage failed for {len(batch)} items - {str(e)}")
+                results = [None] * len(batch)
+            finally:
+                for _ in batch:
+                    stage.queue.task_done()
+            for result in results:
+                if result is None or next_stage is None:
+                    self._finish()
+                else:
+                    # The item stays pending while it moves between stages
+                    await next_stage.queue.put(result)
@@ -0,0 +1,79 @@
+import os
+import sqlite3
+import time
+from typing import List, Optional, Set
+from .cache import cache_dir
+from .models import Article
+from .canonical import canonical_url
+
+
+class ProcessedIndex:
+    """SQLite record of URLs processed in earlier runs and of the runs themselves
+
+    URLs are keyed on their canonical form so tracking and AMP variants match.
+    """
+
+    QUERY_BATCH = 500  # stays below SQLite's bound parameter limit
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(cache_dir(), 'run_state.sqlite')
+        self._conn = sqlite3.connect(self.path)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS processed (
+                url_key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                content_hash TEXT,
+                processed_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                started_at REAL NOT NULL,
+                finished_at REAL
+            );
+        """)
+        self._conn.commit()
+
+    def is_processed(self, url: str) -> bool:
+        row = self._conn.execute(
+            "SELECT 1 FROM processed WHERE url_key = ?", (canonical_url(url),)
+        ).fetchone()
+        return row is not None
+
+    def filter_new(self, articles: List[Article]) -> List[Article]:
+        """Drop articles whose URL was processed in an earlier run"""
+        keys = [canonical_url(article['url']) for article in articles]
+        seen: Set[str] = set()
+        for start in range(0, len(keys), self.QUERY_BATCH):
+            batch = keys[start:start + self.QUERY_BATCH]
+            rows = self._conn.execute(
+                f"SELECT url_key FROM processed WHERE url_key IN ({', '.join('?' * len(batch))})", batch
+            ).fetchall()
+            seen.update(row[0] for row in rows)
+        return [article for article, key in zip(articles, keys) if key not in seen]
+
+    def mark_processed(self, url: str, content_hash: Optional[str] = None) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO processed (url_key, url, content_hash, processed_at) VALUES (?, ?, ?, ?)",
+            (canonical_url(url), url, content_hash, time.time())
+        )
+        self._conn.commit()
+
+    def start_run(self, run_id: str) -> None:
+        self._conn.execute(
+            "INSERT OR IGNORE INTO runs (run_id, started_at) VALUES (?, ?)", (run_id, time.time())
+        )
+        self._conn.commit()
+
+    def finish_run(self, run_id: str) -> None:
+        self._conn.execute("UPDATE runs SET finished_at = ? WHERE run_id = ?", (time.time(), run_id))
+        self._conn.commit()
+
+    def last_run_started_at(self) -> Optional[float]:
+        """Start time of the most recent run that finished, if any"""
+        row = self._conn.execute(
+            "SELECT MAX(started_at) FROM runs WHERE finished_at IS NOT NULL"
+        ).fetchone()
+        return row[0]
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,156 @@
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from typing import List, Optional, Tuple
+from .backends import HedgedBackend
+from .budget import estimate_tokens
+from .exceptions import RateLimitExceededError
+
+# Lower value is served first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 10
+PRIORITY_LOW = 20
+
+
+class TokenBucket:
+    """Continuously refilling bucket holding up to `capacity` units per `period` seconds"""
+
+    def __init__(self, capacity: float, period: float = 60.0):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.available = capacity
+        self._updated = time.monotonic()
+
+    def delay(self, amount: float) -> float:
+        """Seconds until `amount` units can be consumed, 0 if they can be now"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / self.rate
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self.available -= min(amount, self.capacity)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class LLMScheduler:
+    """Rate-limit-aware front for an LLM client's `generate_content`
+
+    Calls are admitted in priority order once both the requests-per-minute and
+    tokens-per-minute buckets allow them. A 429 from any call puts every caller
+    into a shared cooldown with exponential backoff and jitter. All waiting is
+    done with asyncio, so the event loop keeps running.
+    """
+
+    def __init__(
+        self,
+        client,
+        requests_per_minute: int = 15,
+        tokens_per_minute: int = 1_000_000,
+        max_retries: int = 5,
+        base_delay: float = 2.0,
+        max_delay: float = 120.0,
+        default_output_tokens: int = 1024
+    ):
+        self.client = client
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.default_output_tokens = default_output_tokens
+        self._cooldown_until = 0.0
+        self._waiters: List[Tuple[int, int]] = []
+        self._sequence = itertools.count()
+        self._condition = asyncio.Condition()
+        # Hedged duplicate calls are charged to the same buckets, behind first attempts
+        layer = client
+        while layer is not None:
+            if isinstance(layer, HedgedBackend):
+                layer.admit_hedge = self.admit_hedge
+            layer = getattr(layer, 'backend', None)
+
+    async def generate_content(
+        self,
+        model_key: str,
+        prompt: str,
+        temperature: float = 0.2,
+        max_tokens: Optional[int] = None,
+        priority: int = PRIORITY_NORMAL,
+        response_schema: Optional[dict] = None
+    ) -> str:
+        """Generate content once admitted by the scheduler, retrying 429s with backoff"""
+        cost = estimate_tokens(prompt) + (max_tokens or self.default_output_tokens)
+        for attempt in range(self.max_retries + 1):
+            await self._acquire(priority, cost)
+            try:
+                return await self.client.generate_content(
+                    model_key=model_key,
+                    prompt=prompt,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    response_schema=response_schema
+                )
+            except RateLimitExceededError as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self._backoff(attempt, e.retry_after)
+                self._cooldown_until = max(self._cooldown_until, time.monotonic() + delay)
+                print(f"🔄 Rate limited on {model_key}, cooling down for {delay:.1f}s (retry {attempt + 1}/{self.max_retries})")
+        raise RateLimitExceededError()
+
+    async def admit_hedge(self, prompt: str, max_tokens: Optional[int] = None) -> None:
+        """Wait until a hedged duplicate of a call may be sent, and charge it to the buckets"""
+        await self._acquire(PRIORITY_LOW, estimate_tokens(prompt) + (max_tokens or self.default_output_tokens))
+
+    # Private helpers
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        """Exponential backoff with equal jitter, never shorter than the server's hint"""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return max(retry_after or 0, ceiling / 2 + random.uniform(0, ceiling / 2))
+
+    def _delay(self, cost: int) -> float:
+        return max(
+            self._cooldown_until - time.monotonic(),
+            self.requests.delay(1),
+            self.tokens.delay(cost)
+        )
+
+    async def _acquire(self, priority: int, cost: int) -> None:
+        entry = (priority, next(self._sequence))
+        heapq.heappush(self._waiters, entry)
+        try:
+            async with self._condition:
+                while True:
+                    if self._waiters[0] != entry:
+                        await self._condition.wait()
+                        continue
+                    delay = self._delay(cost)
+                    if delay <= 0:
+                        heapq.heappop(self._waiters)
+                        self.requests.consume(1)
+                        self.tokens.consume(cost)
+                        self._condition.notify_all()
+                        return
+                    try:
+                        await asyncio.wait_for(self._condition.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+        except BaseException:
+            if entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                asyncio.ensure_future(self._notify())
+            raise
+
+    async def _notify(self) -> None:
+        async with self._condition:
+            self._condition.notify_all()
@@ -1,26 +1,36 @@
-import requests
-from bs4 import BeautifulSoup
 import os
 from dotenv import load_dotenv
-from requests_html import AsyncHTMLSession
 from .utils import deduplicate
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlsplit
 import asyncio
 import feedparser
+import hashlib
+import re
+import tempfile
 import time
+from collections import OrderedDict
 from pypdf import PdfReader
-import io
-from playwright.async_api import async_playwright
-from typing import Dict, List, Optional, Any
-from .models import Article
+from typing import IO, Callable, Dict, List, Optional, Any, Set
+from .models import Article, FetchedPage
+from .browser import BrowserPool
+from .cache import DiskCache
+from .crawler import BloomFilter, HostThrottle, IndexCrawler, UrlFilter
+from .extraction import HtmlExtractor
+from .http_client import HttpClient
+from .exceptions import BrowserCrashedError
+from .metrics import metrics
 
 # Load environment variables
 load_dotenv()
 
+# Cheap pre-parse scan of RSS <guid> / Atom <id> values
+_FEED_ENTRY_ID = re.compile(r'<(guid|id)\b[^>]*>\s*(.*?)\s*</\1>', re.DOTALL | re.IGNORECASE)
+
 class Scraper:
     """Handles all scraping operations including article extraction and processing"""
     
     UNKNOWN = ""
+    MAX_SEEN_FEED_IDS = 500
     
     def __init__(self):
         self.headers = {
@@ -37,6 +47,63 @@ class Scraper:
             'render_sleep': 3,
             'render_retries': 3
         }
+        self.limits = {
+            'pdf_max_bytes': int(os.getenv('PDF_MAX_BYTES', 20 * 1024 * 1024)),
+            'pdf_spool_bytes': 2 * 1024 * 1024,  # PDFs larger than this are buffered on disk
+            'pdf_max_chars': 15000,  # text beyond what the LLM stage reads is not extracted
+            'prefetch_max_pages': 500  # pages downloaded ahead of fetch_article, e.g. to date index links
+        }
+        self.http = HttpClient(
+            headers=self.headers,
+            timeout=self.timeouts['get'],
+            max_connections=int(os.getenv('HTTP_MAX_CONNECTIONS', 100)),
+            max_connections_per_host=int(os.getenv('HTTP_MAX_CONNECTIONS_PER_HOST', 6)),
+            max_in_flight=int(os.getenv('HTTP_MAX_IN_FLIGHT', 32))
+        )
+        self.browser_pool = BrowserPool(
+            max_pages=int(os.getenv('BROWSER_MAX_PAGES', 4)),
+            max_navigations=int(os.getenv('BROWSER_MAX_NAVIGATIONS', 50)),
+            launch_args=['--disable-blink-features=AutomationControlled'],
+            context_options={
+                'user_agent': self.headers['User-Agent'],
+                'viewport': {'width': 1920, 'height': 1080},
+                'java_script_enabled': True
+            }
+        )
+        # ETag, Last-Modified, body hash and entry ids from the previous fetch of each feed
+        self.feed_state = DiskCache(namespace='feed_state', ttl_seconds=None)
+        self._fetched_feeds: Dict[str, Dict[str, Any]] = {}
+        self._prefetched: 'OrderedDict[str, bytes]' = OrderedDict()
+        # Pages shorter than this after a plain GET are re-fetched through the browser
+        self.min_static_text_chars = int(os.getenv('STATIC_MIN_TEXT_CHARS', 500))
+        # Domains always rendered with the browser, in addition to those learned in domain_policy
+        self.js_domains = {domain.strip() for domain in os.getenv('JS_DOMAINS', '').split(',') if domain.strip()}
+        self.domain_policy = DiskCache(namespace='domain_policy', ttl_seconds=30 * 86400)
+        self.crawl_config = {
+            'max_pages': int(os.getenv('CRAWL_MAX_PAGES', 50)),
+            'workers': int(os.getenv('CRAWL_WORKERS', 4)),
+            'politeness_seconds': float(os.getenv('CRAWL_POLITENESS_SECONDS', 1.0))
+        }
+        # Index pages rendered during this run, shared by every crawl so none is rendered twice
+        self.seen_index_pages = BloomFilter(capacity=int(os.getenv('CRAWL_SEEN_CAPACITY', 100_000)))
+        self.host_throttle = HostThrottle(self.crawl_config['politeness_seconds'])
+        extract_workers = os.getenv('EXTRACT_WORKERS')
+        self.extractor = HtmlExtractor(
+            parser=os.getenv('HTML_PARSER'),
+            max_workers=int(extract_workers) if extract_workers else None
+        )
+
+    async def __aenter__(self) -> 'Scraper':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Release the shared browser, HTTP connections and parser processes"""
+        await self.browser_pool.close()
+        await self.http.close()
+        self.extractor.close()
 
     # Public interface methods
     async def extract_from_index(
@@ -45,45 +112,46 @@ class Scraper:
         css_selector: Optional[str] = None,
         class_name: Optional[str] = None,
         include_patterns: Optional[List[str]] = None,
-        exclude_patterns: Optional[List[str]] = None
+        exclude_patterns: Optional[List[str]] = None,
+        follow_selector: Optional[str] = None,
+        max_depth: int = 0
     ) -> List[Article]:
-        """Extract articles from index pages"""
+        """Extract articles from index pages
+
+        With `follow_selector` and a `max_depth`, index pages linked from the
+        root (pagination, categories) are crawled too, up to that many levels.
+        """
         try:
-            html = await self._get_page_html(root_url)
-            print(f"=== extract_from_index html ===\n {html} \n=== end of extract_from_index html ===\n") if os.getenv('DEBUG') == 'true' else None
-            
-            soup = BeautifulSoup(html, 'html.parser')
-            links = soup.find_all('a', href=True)
-            if css_selector:
-                links = soup.select(css_selector)
-            elif class_name:
-                links = [link for link in links if class_name in link.get('class', [])]
-            post_links = []
-            for link in links:
-                url = urljoin(root_url, link['href'])
-                
-                # Inclusion check
-                include = True
-                if include_patterns:
-                    include = any(pattern in url for pattern in include_patterns)
-                
-                # Exclusion check
-                if exclude_patterns and any(pattern in url for pattern in exclude_patterns):
-                    include = False
-                    
-                if include:
-                    post_links.append(Article(
-                        url=url,
-                        title=self.UNKNOWN,
-                        author=self.UNKNOWN,
-                        publish_at=None,
-                        tags=None,
-                        date=None,
-                        summary=None,
-                        timestamp=None
-                    ))
-            
-            return post_links
+            crawler = IndexCrawler(
+                self._get_index_html,
+                self.extractor.links,
+                self.seen_index_pages,
+                self.host_throttle,
+                max_depth=max_depth,
+                max_pages=self.crawl_config['max_pages'],
+                workers=self.crawl_config['workers']
+            )
+            urls = await crawler.crawl(
+                root_url,
+                css_selector=css_selector,
+                class_name=class_name,
+                follow_selector=follow_selector,
+                url_filter=UrlFilter(include_patterns, exclude_patterns)
+            )
+            return [
+                Article(
+                    url=url,
+                    title=self.UNKNOWN,
+                    author=self.UNKNOWN,
+                    publish_at=None,
+                    tags=None,
+                    date=None,
+                    summary=None,
+                    timestamp=None,
+                    sources=[]
+                )
+                for url in urls
+            ]
 
         except Exception as e:
             print(f"Index extraction failed: {str(e)}")
@@ -91,11 +159,26 @@ class Scraper:
 
     async def extract_from_rss(self, rss_url: str) -> List[Article]:
         """Extract articles from RSS feeds"""
-        session = AsyncHTMLSession()
         try:
-            response = await session.get(rss_url, timeout=self.timeouts['get'], headers=self.headers)
+            state = self.feed_state.get(rss_url) or {}
+            with metrics.timer('feed.fetch', urlsplit(rss_url).netloc) as sample:
+                response = await self.http.get(rss_url, headers=self._conditional_headers(state))
+                sample['bytes'] = len(response.content)
+            if response.status_code == 304:
+                print(f"💤 {rss_url} not modified since last fetch")
+                return []
             if response.status_code == 200:
-                feed = feedparser.parse(response.text)
+                body_hash = hashlib.sha256(response.content).hexdigest()
+                entry_ids = self._scan_feed_entry_ids(response.text)
+                unchanged = body_hash == state.get('body_hash') or (
+                    entry_ids and entry_ids.issubset(state.get('entry_ids', []))
+                )
+                if unchanged:
+                    print(f"💤 {rss_url} has no new entries since last fetch")
+                    return []
+                
+                with metrics.timer('feed.parse', urlsplit(rss_url).netloc):
+                    feed = feedparser.parse(response.text)
                 items = []
                 
                 for entry in feed.entries:
@@ -122,28 +205,112 @@ class Scraper:
                             tags=None,
                             date=None,
                             summary=None,
-                            timestamp=None
+                            timestamp=None,
+                            sources=[]
                         ))
-                        
+                
+                # Saved by save_feed_state once the run has handled these entries
+                self._fetched_feeds[rss_url] = {
+                    'state': {
+                        'etag': response.headers.get('ETag'),
+                        'last_modified': response.headers.get('Last-Modified'),
+                        'body_hash': body_hash,
+                        'entry_ids': list(entry_ids)[:self.MAX_SEEN_FEED_IDS]
+                    },
+                    'articles': items
+                }
                 return items
                 
             return []
         except Exception as e:
             print(f"RSS Error: {str(e)}")
             return []
-        finally:
-            await session.close()
+
+    def save_feed_state(self, settled: Callable[[Article], bool]) -> None:
+        """Remember the feeds fetched this run, so unchanged ones are skipped next time
+
+        Call once the run has completed. A feed with an entry that is not
+        `settled` (processed, or outside the window) is forgotten instead, so
+        the entry is fetched again rather than hidden behind a 304.
+        """
+        for rss_url, fetched in self._fetched_feeds.items():
+            if all(settled(article) for article in fetched['articles']):
+                self.feed_state.set(rss_url, fetched['state'])
+            else:
+                self.feed_state.delete(rss_url)
+        self._fetched_feeds.clear()
 
     async def scrape_article(self, url: str) -> str:
         """Main entry point for article scraping"""
         try:
-            if url.lower().endswith('.pdf'):
-                return await self._process_pdf(url)
-            return await self._process_html(url)
+            text = await self.extract_article(await self.fetch_article(url))
+            if text is None:
+                text = await self.extract_article(await self.fetch_article(url, render=True))
+            return text or ""
         except Exception as e:
             print(f"Scraping error: {str(e)}")
             return ""
 
+    async def fetch_article(self, url: str, render: bool = False) -> FetchedPage:
+        """Download an article without parsing it
+
+        HTML comes from a plain GET unless `render` is set or the domain is
+        known to need JavaScript; PDFs are spooled into a capped buffer.
+        """
+        if url.lower().endswith('.pdf'):
+            return FetchedPage(url=url, kind='pdf', body=await self._download_pdf(url), rendered=False)
+        if render or self._needs_js(urlsplit(url).netloc):
+            return FetchedPage(url=url, kind='html', body=await self._get_page_html(url), rendered=True)
+        body = self._prefetched.pop(url, None)
+        if body is None:
+            body = await self._get_static_html(url)
+        return FetchedPage(url=url, kind='html', body=body, rendered=False)
+
+    async def prefetch_html(self, url: str) -> bytes:
+        """Plain GET of a page, kept for the next static `fetch_article` of it
+
+        Lets a page read before the article stage, such as an index link
+        being dated, be extracted without downloading it again. At most
+        `prefetch_max_pages` bodies are kept, the oldest dropped first.
+        """
+        html = await self._get_static_html(url)
+        if html and not self._needs_js(urlsplit(url).netloc):
+            self._prefetched[url] = html
+            self._prefetched.move_to_end(url)
+            while len(self._prefetched) > self.limits['prefetch_max_pages']:
+                self._prefetched.popitem(last=False)
+        return html
+
+    async def extract_article(self, page: FetchedPage) -> Optional[str]:
+        """Main text of a fetched page, None when a static page has to be rendered with the browser"""
+        domain = urlsplit(page['url']).netloc
+        if page['kind'] == 'pdf':
+            with page['body'] as pdf_stream, metrics.timer('scrape.pdf_extract', domain):
+                # pypdf is pure CPU, keep it off the event loop
+                return await asyncio.to_thread(self._extract_pdf_text, pdf_stream, self.limits['pdf_max_chars'])
+        
+        with metrics.timer('scrape.extract', domain):
+            extracted_text = await self.extractor.main_text(page['body'])
+        if len(extracted_text) >= self.min_static_text_chars:
+            self._learn_needs_js(domain, page['rendered'])
+        elif not page['rendered']:
+            print(f"🐢 Static fetch of {page['url']} returned {len(extracted_text)} chars, rendering with browser")
+            return None
+        print(f"=== extracted text ===\n {extracted_text} \n=== end of extracted text ===\n") if os.getenv('DEBUG') == 'true' else None
+        return extracted_text
+
+    def _conditional_headers(self, state: Dict[str, Any]) -> Dict[str, str]:
+        """Build If-None-Match / If-Modified-Since headers from a feed's previous fetch"""
+        headers = {}
+        if state.get('etag'):
+            headers['If-None-Match'] = state['etag']
+        if state.get('last_modified'):
+            headers['If-Modified-Since'] = state['last_modified']
+        return headers
+
+    def _scan_feed_entry_ids(self, text: str) -> Set[str]:
+        return {match.group(2) for match in _FEED_ENTRY_ID.finditer(text)}
+
     def _clean_content(self, html: str) -> str:
         """Sanitize HTML content"""
         return html.replace('<!--', '').replace('-->', '')\
@@ -151,67 +318,99 @@ class Scraper:
                   .replace('javascript:', '')
 
     # Private helper methods
-    # TODO: consider optimising this to use a single browser instance, avoid creating a new one for each request
     async def _get_page_html(self, url: str, wait_until: str = 'networkidle') -> str:
-        """Get rendered HTML using Playwright with configurable timeouts"""
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(
-                headless=True,
-                args=['--disable-blink-features=AutomationControlled']
-            )
+        """Get rendered HTML from the shared browser pool with configurable timeouts"""
+        for attempt in range(1, self.timeouts['render_retries'] + 1):
             try:
-                context = await browser.new_context(
-                    user_agent=self.headers['User-Agent'],
-                    viewport={'width': 1920, 'height': 1080},
-                    java_script_enabled=True
-                )
-                page = await context.new_page()
-                await page.goto(url, wait_until="domcontentloaded", 
-                              timeout=self.timeouts['get'] * 1000)
-                
-                try:
-                    await page.wait_for_load_state(wait_until, 
-                                                 timeout=self.timeouts['get'] * 1000)
-                except Exception as e:
-                    print(f"Timeout waiting for {url} until {wait_until}: {str(e)}, but continuing ... since it's not a critical error and may be expected for certain websites due to say analytics or tracking scripts")
-                
-                return await page.content()
-            finally:
-                await browser.close()
+                with metrics.timer('scrape.render', urlsplit(url).netloc) as sample:
+                    async with self.browser_pool.page() as page:
+                        await page.goto(url, wait_until="domcontentloaded", 
+                                      timeout=self.timeouts['get'] * 1000)
+                        
+                        try:
+                            await page.wait_for_load_state(wait_until, 
+                                                         timeout=self.timeouts['get'] * 1000)
+                        except Exception as e:
+                            print(f"Timeout waiting for {url} until {wait_until}: {str(e)}, but continuing ... since it's not a critical error and may be expected for certain websites due to say analytics or tracking scripts")
+                        
+                        html = await page.content()
+                        sample['bytes'] = len(html)
+                        return html
+            except BrowserCrashedError as e:
+                if attempt == self.timeouts['render_retries']:
+                    raise
+                print(f"🔄 Browser crashed while rendering {url} ({str(e)}), retrying {attempt}/{self.timeouts['render_retries']}")
+        return ""
 
-    async def _process_pdf(self, url: str) -> str:
-        """Handle PDF content extraction"""
-        session = AsyncHTMLSession()
-        try:
-            response = await session.get(url, timeout=self.timeouts['get'], headers=self.headers)
-            pdf_stream = io.BytesIO(response.content)
-            reader = PdfReader(pdf_stream)
-            return '\n'.join([page.extract_text() for page in reader.pages])
-        finally:
-            await session.close()
-
-    async def _process_html(self, url: str) -> str:
-        """Handle HTML content extraction"""
+    async def _get_index_html(self, url: str) -> str:
         html = await self._get_page_html(url)
-        
-        soup = BeautifulSoup(html, 'html.parser')
-        # Remove non-content elements
-        for tag in soup(['script', 'style', 'nav', 'header', 'footer', 
-                        'aside', 'form', 'svg', 'link', 'meta']):
-            tag.decompose()
-        # Find main content using multiple heuristics
-        main_content = (
-            soup.find('article') or 
-            soup.find('main') or 
-            soup.find('div', role='main') or 
-            soup.find(class_=['article', 'content', 'post']) or 
-            soup.body
-        )
-        text = main_content.get_text(separator='\n', strip=True)
-        extracted_text = '\n'.join(line.strip() for line in text.split('\n') if line.strip())
-        
-        print(f"=== extracted text ===\n {extracted_text} \n=== end of extracted text ===\n") if os.getenv('DEBUG') == 'true' else None
-        return extracted_text
+        print(f"=== extract_from_index html ===\n {html} \n=== end of extract_from_index html ===\n") if os.getenv('DEBUG') == 'true' else None
+        return html
+
+    async def _download_pdf(self, url: str) -> IO[bytes]:
+        """Stream a PDF into a spooled buffer, refusing PDFs over `pdf_max_bytes`
+
+        A truncated PDF cannot be parsed (its cross-reference table is at the
+        end), so an oversized one is skipped rather than partially downloaded.
+        """
+        max_bytes = self.limits['pdf_max_bytes']
+        pdf_stream = tempfile.SpooledTemporaryFile(max_size=self.limits['pdf_spool_bytes'])
+        try:
+            with metrics.timer('scrape.pdf', urlsplit(url).netloc) as sample:
+                async with self.http.stream(url) as response:
+                    response.raise_for_status()
+                    declared = response.headers.get('Content-Length', '')
+                    if declared.isdigit() and int(declared) > max_bytes:
+                        raise ValueError(f"PDF {url} is {declared} bytes, over the {max_bytes} byte limit - skipped")
+                    size = 0
+                    async for chunk in response.aiter_bytes():
+                        size += len(chunk)
+                        if size > max_bytes:
+                            raise ValueError(f"PDF {url} exceeds the {max_bytes} byte limit - skipped")
+                        pdf_stream.write(chunk)
+                sample['bytes'] = size
+        except BaseException:
+            pdf_stream.close()
+            raise
+        pdf_stream.seek(0)
+        return pdf_stream
+
+    def _extract_pdf_text(self, pdf_stream: IO[bytes], max_chars: int) -> str:
+        """Extract text page by page until `max_chars` characters are collected"""
+        reader = PdfReader(pdf_stream)
+        texts = []
+        length = 0
+        for page in reader.pages:
+            text = page.extract_text() or ""
+            texts.append(text)
+            length += len(text) + 1
+            if length >= max_chars:
+                break
+        return '\n'.join(texts)
+
+    async def _get_static_html(self, url: str) -> bytes:
+        """Plain HTTP GET of a page as raw bytes, empty if it is not a successful HTML response"""
+        try:
+            with metrics.timer('scrape.static', urlsplit(url).netloc) as sample:
+                response = await self.http.get(url)
+                sample['bytes'] = len(response.content)
+        except Exception as e:
+            print(f"Static fetch failed for {url}: {str(e)}")
+            return b""
+        if response.status_code != 200 or 'html' not in response.headers.get('Content-Type', 'text/html'):
+            return b""
+        return response.content
+
+    def _needs_js(self, domain: str) -> bool:
+        if domain in self.js_domains:
+            return True
+        policy = self.domain_policy.get(domain)
+        return bool(policy and policy.get('needs_js'))
+
+    def _learn_needs_js(self, domain: str, needs_js: bool) -> None:
+        policy = self.domain_policy.get(domain)
+        if policy is None or policy.get('needs_js') != needs_js:
+            self.domain_policy.set(domain, {'needs_js': needs_js})
 
 async def main():
     scraper = Scraper()
@@ -243,6 +442,8 @@ async def main():
     
     reuter_captcha = await scraper.scrape_article("https://www.reuters.com/world/us/trump-admin-take-down-most-government-websites-5-pm-cbs-reports-2025-01-31/")
     print(f"=== reuter_captcha ===\n {reuter_captcha} \n=== end of reuter_captcha ===\n")
+    
+    await scraper.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,70 @@
+import json
+import os
+from typing import IO, List, Optional, Set
+from .canonical import canonical_url
+from .models import Article
+
+
+class JsonlSink:
+    """Append-only JSON Lines file of completed articles
+
+    Each article is flushed as soon as it is written, so a crash loses at most
+    the line being written. `finalize` turns the stream into the pretty-printed
+    results JSON with an atomic rename.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file: Optional[IO[str]] = None
+
+    def read(self) -> List[Article]:
+        """Articles written so far, ignoring a torn last line from a crash"""
+        if not os.path.exists(self.path):
+            return []
+        articles = []
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    articles.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break
+        return articles
+
+    def completed_urls(self) -> Set[str]:
+        return {canonical_url(article['url']) for article in self.read()}
+
+    def write(self, article: Article) -> None:
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._truncate_torn_line()
+            self._file = open(self.path, 'a')
+        self._file.write(json.dumps(article) + '\n')
+        self._file.flush()
+
+    def finalize(self, json_path: str, articles: Optional[List[Article]] = None) -> List[Article]:
+        """Write the streamed articles, or a reordered `articles`, to `json_path` atomically"""
+        self.close()
+        if articles is None:
+            articles = self.read()
+        tmp_path = f"{json_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(articles, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, json_path)
+        return articles
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # Private helpers
+    def _truncate_torn_line(self) -> None:
+        """Drop a partial last line left by a crash so appends start on a fresh line"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb+') as f:
+            content = f.read()
+            if content and not content.endswith(b'\n'):
+                f.truncate(content.rfind(b'\n') + 1)
@@ -0,0 +1,176 @@
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+SUMMARY_FIELDS = ('tags', 'date', 'author', 'title', 'summary')
+
+_SUMMARY_PROPERTIES = {field: {'type': 'string'} for field in SUMMARY_FIELDS}
+# Response schemas for the model's JSON mode, in the OpenAPI subset Gemini accepts
+SUMMARY_SCHEMA = {
+    'type': 'object',
+    'properties': _SUMMARY_PROPERTIES,
+    'required': list(SUMMARY_FIELDS),
+}
+BATCH_SCHEMA = {
+    'type': 'array',
+    'items': {
+        'type': 'object',
+        'properties': {'id': {'type': 'integer'}, **_SUMMARY_PROPERTIES},
+        'required': ['id', *SUMMARY_FIELDS],
+    },
+}
+
+# One pass over the response for every tag; a missing close tag ends at the next tag or the end
+_TAG = re.compile(
+    r'<(tags|date|author|title|summary)>(.*?)(?:</\1>|(?=<(?:tags|date|author|title|summary)>)|(?=</article>)|\Z)',
+    re.DOTALL
+)
+_BATCH_ARTICLE = re.compile(r'<article id="?(\d+)"?>(.*?)(?:</article>|(?=<article id=)|\Z)', re.DOTALL)
+_CODE_FENCE = re.compile(r'^\s*```(?:json)?\s*|\s*```\s*$')
+# "field": "value" pairs, including a value cut off by the end of the response
+_JSON_FIELD = re.compile(r'"(id|tags|date|author|title|summary)"\s*:\s*(?:"((?:[^"\\]|\\.)*)(?:"|\Z)|(-?\d+))', re.DOTALL)
+
+
+def parse_tagged(text: str) -> Dict[str, str]:
+    """Fields of a `<tag>value</tag>` response, tolerating missing close tags"""
+    fields: Dict[str, str] = {}
+    for match in _TAG.finditer(text):
+        fields.setdefault(match.group(1), match.group(2).strip())
+    return fields
+
+
+def repair_json(text: str) -> str:
+    """Make truncated or sloppy JSON parseable
+
+    Closes an unterminated string, drops a key left without a value and
+    trailing commas, and closes every open object and array, in one scan.
+    """
+    out = []
+    stack: List[str] = []  # closers of the open objects and arrays
+    in_string = escaped = False
+    expecting_key = value_pending = False
+    member_start = 0  # where the current object member begins, its comma included
+    dangling_key: Optional[int] = None
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+            elif char == '\n':
+                char = '\\n'
+            out.append(char)
+            continue
+        if value_pending and not char.isspace():
+            value_pending = False
+            dangling_key = None
+        if char == '"':
+            in_string = True
+            if expecting_key:
+                dangling_key = member_start
+                expecting_key = False
+        elif char == ':':
+            value_pending = True
+        elif char == ',':
+            expecting_key = bool(stack) and stack[-1] == '}'
+            member_start = len(out)
+        elif char in '{[':
+            stack.append('}' if char == '{' else ']')
+            expecting_key = char == '{'
+            member_start = len(out) + 1
+        elif char in '}]':
+            _strip_trailing_comma(out)
+            if stack:
+                stack.pop()
+            expecting_key = False
+            dangling_key = None
+        out.append(char)
+    if in_string:
+        if escaped:
+            out.pop()
+        out.append('"')
+    if dangling_key is not None:
+        del out[dangling_key:]
+    _strip_trailing_comma(out)
+    return ''.join(out).rstrip() + ''.join(reversed(stack))
+
+
+def parse_json(text: str) -> Optional[Any]:
+    """Parse a JSON response, repairing it if needed; None if it is beyond repair"""
+    text = _CODE_FENCE.sub('', text.strip())
+    for candidate in (text, repair_json(text)):
+        try:
+            return json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+    return None
+
+
+def recover_fields(text: str) -> Dict[str, str]:
+    """Pull whatever summary fields are readable out of broken JSON"""
+    fields: Dict[str, str] = {}
+    for match in _JSON_FIELD.finditer(text):
+        value = match.group(2) if match.group(2) is not None else match.group(3)
+        try:
+            value = json.loads(f'"{value}"') if match.group(2) is not None else value
+        except json.JSONDecodeError:
+            pass
+        fields.setdefault(match.group(1), value)
+    return fields
+
+
+def parse_summary(text: str) -> Dict[str, str]:
+    """Summary fields from a JSON or tagged response, with whatever could be recovered"""
+    stripped = _CODE_FENCE.sub('', text.strip())
+    if not stripped.startswith(('{', '[')):
+        return parse_tagged(text)
+    parsed = parse_json(stripped)
+    if isinstance(parsed, list) and parsed:
+        parsed = parsed[0]
+    if isinstance(parsed, dict):
+        return _summary_fields(parsed)
+    return {field: value for field, value in recover_fields(stripped).items() if field in SUMMARY_FIELDS}
+
+
+def parse_batch(text: str) -> Dict[int, Dict[str, str]]:
+    """Summary fields by article id from a batched JSON or tagged response"""
+    stripped = _CODE_FENCE.sub('', text.strip())
+    if not stripped.startswith(('{', '[')):
+        return {int(match.group(1)): parse_tagged(match.group(2)) for match in _BATCH_ARTICLE.finditer(text)}
+    parsed = parse_json(stripped)
+    if isinstance(parsed, dict):
+        parsed = [parsed]
+    if not isinstance(parsed, list):
+        return {}
+    results: Dict[int, Dict[str, str]] = {}
+    for item in parsed:
+        if not isinstance(item, dict):
+            continue
+        try:
+            article_id = int(item['id'])
+        except (KeyError, TypeError, ValueError):
+            continue
+        results[article_id] = _summary_fields(item)
+    return results
+
+
+def _summary_fields(item: Dict[str, Any]) -> Dict[str, str]:
+    fields = {}
+    for field in SUMMARY_FIELDS:
+        value = item.get(field)
+        if isinstance(value, list):
+            value = ', '.join(str(element) for element in value)
+        if value is not None:
+            fields[field] = str(value).strip()
+    return fields
+
+
+def _strip_trailing_comma(out: list) -> None:
+    i = len(out) - 1
+    while i >= 0 and out[i].isspace():
+        i -= 1
+    if i >= 0 and out[i] == ',':
+        del out[i]
+
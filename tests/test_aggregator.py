@@ -0,0 +1,152 @@
+import asyncio
+import pytest
+from content_aggregator import ContentAggregator
+from content_aggregator.backends import LocalBackend
+from content_aggregator.exceptions import RateLimitExceededError
+from content_aggregator.llm import LLMProcessor
+
+class FakeScraper:
+    """Serves article text by URL; pages marked `js_only` have no text until rendered"""
+
+    def __init__(self, pages, latency=None, js_only=()):
+        self.pages = pages
+        self.latency = latency or {}
+        self.js_only = set(js_only)
+        self.fetches = []
+        self.limits = {}
+        self.http = None
+        self.extractor = type('Extractor', (), {'max_workers': 2})()
+
+    async def fetch_article(self, url, render=False):
+        self.fetches.append((url, render))
+        await asyncio.sleep(self.latency.get(url, 0))
+        return {'url': url, 'kind': 'html', 'body': self.pages[url], 'rendered': render}
+
+    async def extract_article(self, page):
+        if page['url'] in self.js_only and not page['rendered']:
+            return None
+        return page['body']
+
+    async def prefetch_html(self, url):
+        return self.pages[url].encode()
+
+class FlakyBackend(LocalBackend):
+    """Local backend answering 429 to its first `failures` calls"""
+
+    RETRY_AFTER_DEFAULT = 0
+
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+        self.calls = 0
+
+    async def generate_content(self, model_key, prompt, temperature=0.2, max_tokens=None, response_schema=None):
+        self.calls += 1
+        if model_key == 'summarize' and self.calls <= self.failures:
+            raise RateLimitExceededError(retry_after=0)
+        return await super().generate_content(model_key, prompt, temperature, max_tokens, response_schema)
+
+@pytest.fixture
+def make_aggregator(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setenv('GEMINI_MAX_RETRIES', '0')
+    def make(scraper, backend=None):
+        return ContentAggregator(scraper=scraper, llm=LLMProcessor(backend=backend or LocalBackend()))
+    return make
+
+def _pages(count):
+    return {f"https://a.example.com/{i}": f"Post {i}\nThis is article number {i}." for i in range(count)}
+
+@pytest.mark.asyncio
+async def test_results_keep_input_order(make_aggregator):
+    pages = _pages(6)
+    # Earlier articles finish last
+    latency = {url: 0.01 * (6 - i) for i, url in enumerate(pages)}
+    aggregator = make_aggregator(FakeScraper(pages, latency=latency))
+
+    results = await aggregator.process_articles([{'url': url} for url in pages])
+
+    assert [result['url'] for result in results] == list(pages)
+    assert [result['title'] for result in results] == [f"Post {i}" for i in range(6)]
+    assert all(aggregator.processed.is_processed(url) for url in pages)
+
+@pytest.mark.asyncio
+async def test_js_only_pages_are_fetched_again_rendered(make_aggregator):
+    pages = _pages(3)
+    scraper = FakeScraper(pages, js_only=["https://a.example.com/1"])
+    aggregator = make_aggregator(scraper)
+
+    results = await aggregator.process_articles([{'url': url} for url in pages])
+
+    assert [result['url'] for result in results] == list(pages)
+    assert scraper.fetches.count(("https://a.example.com/1", False)) == 1
+    assert scraper.fetches.count(("https://a.example.com/1", True)) == 1
+    assert len(scraper.fetches) == 4
+
+@pytest.mark.asyncio
+async def test_rate_limited_articles_are_requeued_once(make_aggregator):
+    pages = _pages(2)
+    backend = FlakyBackend(failures=1)
+    aggregator = make_aggregator(FakeScraper(pages), backend)
+
+    results = await aggregator.process_articles([{'url': url} for url in pages])
+
+    assert [result['url'] for result in results] == list(pages)
+    assert backend.calls >= 2
+
+@pytest.mark.asyncio
+async def test_articles_rate_limited_twice_are_dropped(make_aggregator):
+    pages = _pages(2)
+    backend = FlakyBackend(failures=1000)
+    aggregator = make_aggregator(FakeScraper(pages), backend)
+    aggregator.config['llm_batch_size'] = 1
+
+    results = await aggregator.process_articles([{'url': url} for url in pages])
+
+    assert results == []
+    # Each article tried once and re-queued once
+    assert backend.calls == 4
+    assert not any(aggregator.processed.is_processed(url) for url in pages)
+
+@pytest.mark.asyncio
+async def test_failed_summaries_are_retried_once_and_left_unrecorded(make_aggregator):
+    class NoSummaryBackend(LocalBackend):
+        calls = 0
+        async def generate_content(self, model_key, prompt, temperature=0.2, max_tokens=None, response_schema=None):
+            self.calls += 1
+            return '{"title": "Cut short"}'
+    pages = _pages(2)
+    backend = NoSummaryBackend()
+    aggregator = make_aggregator(FakeScraper(pages), backend)
+    aggregator.config['llm_batch_size'] = 1
+
+    results = await aggregator.process_articles([{'url': url} for url in pages])
+
+    assert results == []
+    assert backend.calls == 4
+    assert not any(aggregator.processed.is_processed(url) for url in pages)
+    assert aggregator.checkpoint.summarized_urls() == set()
+
+@pytest.mark.asyncio
+async def test_duplicate_is_summarized_when_its_representative_fails(make_aggregator):
+    class FailsOriginalBackend(LocalBackend):
+        async def generate_content(self, model_key, prompt, temperature=0.2, max_tokens=None, response_schema=None):
+            if model_key == 'summarize' and "Original copy" in prompt:
+                return '{"title": "Cut short"}'
+            return await super().generate_content(model_key, prompt, temperature, max_tokens, response_schema)
+    body = " ".join(f"Sentence {i} of the widely syndicated storage drive report." for i in range(8))
+    pages = {
+        "https://a.example.com/original": f"Original copy\n{body}",
+        "https://b.example.com/dup": f"Mirror copy\n{body}",
+    }
+    aggregator = make_aggregator(FakeScraper(pages), FailsOriginalBackend())
+    aggregator.config['llm_batch_size'] = 1
+
+    results = await aggregator.process_articles([{'url': url} for url in pages])
+
+    assert [result['url'] for result in results] == ["https://b.example.com/dup"]
+    assert results[0]['sources'] == ["https://b.example.com/dup"]
+    assert aggregator.processed.is_processed("https://b.example.com/dup")
+    assert not aggregator.processed.is_processed("https://a.example.com/original")
+    assert aggregator.checkpoint.summarized_urls('duplicate') == set()
@@ -0,0 +1,108 @@
+import asyncio
+import pytest
+from content_aggregator.backends import (
+    BACKENDS, ConcurrencyLimitedBackend, HedgedBackend, LLMBackend, LocalBackend, create_backend
+)
+from content_aggregator.llm import LLMProcessor
+from content_aggregator.scheduler import LLMScheduler
+
+class ScriptedBackend(LLMBackend):
+    """Answers with a per-call delay and result, tracking concurrent calls"""
+
+    def __init__(self, delays, results=None):
+        self.model_names = {'summarize': 'scripted'}
+        self.delays = list(delays)
+        self.results = list(results or [f"answer {i}" for i in range(len(delays))])
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def generate_content(self, model_key, prompt, temperature=0.2, max_tokens=None, response_schema=None):
+        delay, result = self.delays.pop(0), self.results.pop(0)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self.in_flight -= 1
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+def test_create_backend_selects_from_registry(monkeypatch):
+    monkeypatch.setenv('LLM_BACKEND', 'local')
+    monkeypatch.setenv('LLM_MAX_CONCURRENCY', '3')
+    monkeypatch.setenv('LLM_HEDGE_AFTER_SECONDS', '2')
+    backend = create_backend()
+    # The limit wraps the hedging, so waiting for a slot does not count towards hedge_after
+    assert isinstance(backend, ConcurrencyLimitedBackend)
+    assert isinstance(backend.backend, HedgedBackend)
+    assert backend.backend.slots is backend.slots
+    assert backend.model_names == LocalBackend().model_names
+    with pytest.raises(ValueError):
+        create_backend('unknown')
+
+@pytest.mark.asyncio
+async def test_local_backend_runs_the_processor_without_credentials(tmp_path, monkeypatch):
+    monkeypatch.setenv('CACHE_DIR', str(tmp_path))
+    processor = LLMProcessor(backend=LocalBackend())
+    posts = [
+        (f"Post {i} title\nPublished 2025-03-0{i}. The first sentence of post {i}. Another sentence.", f"https://a.example.com/{i}")
+        for i in range(1, 4)
+    ]
+    results = await processor.summarize_many(posts)
+    assert [result['title'] for result in results] == ["Post 1 title", "Post 2 title", "Post 3 title"]
+    assert results[1]['date'] == "2025-03-02"
+    assert (await processor.summarize_all([result['summary'] for result in results])).startswith("**Key Insights**")
+    assert await processor.extract_date_llm("<html><time>2025-01-31</time></html>") == "2025-01-31"
+
+@pytest.mark.asyncio
+async def test_hedged_backend_returns_first_answer():
+    slow_first = ScriptedBackend(delays=[1.0, 0.01])
+    hedged = HedgedBackend(slow_first, hedge_after=0.05)
+    assert await hedged.generate_content('summarize', 'prompt') == "answer 1"
+    assert hedged.hedges == 1
+
+    fast = ScriptedBackend(delays=[0.01])
+    hedged = HedgedBackend(fast, hedge_after=0.5)
+    assert await hedged.generate_content('summarize', 'prompt') == "answer 0"
+    assert hedged.hedges == 0
+
+@pytest.mark.asyncio
+async def test_hedged_backend_raises_when_every_call_fails():
+    failing = ScriptedBackend(delays=[0.1, 0.01], results=[RuntimeError("first"), RuntimeError("second")])
+    with pytest.raises(RuntimeError):
+        await HedgedBackend(failing, hedge_after=0.05).generate_content('summarize', 'prompt')
+
+@pytest.mark.asyncio
+async def test_concurrency_limited_backend_caps_in_flight_calls():
+    backend = ScriptedBackend(delays=[0.02] * 6)
+    limited = ConcurrencyLimitedBackend(backend, max_concurrency=2)
+    await asyncio.gather(*(limited.generate_content('summarize', 'prompt') for _ in range(6)))
+    assert backend.max_in_flight == 2
+
+@pytest.mark.asyncio
+async def test_hedges_take_their_own_concurrency_slot(monkeypatch):
+    monkeypatch.setenv('LLM_MAX_CONCURRENCY', '2')
+    monkeypatch.setenv('LLM_HEDGE_AFTER_SECONDS', '0.02')
+    scripted = ScriptedBackend(delays=[0.1] * 16)
+    monkeypatch.setitem(BACKENDS, 'scripted', lambda: scripted)
+    backend = create_backend('scripted')
+    await asyncio.gather(*(backend.generate_content('summarize', 'prompt') for _ in range(4)))
+    assert backend.backend.hedges > 0
+    assert scripted.max_in_flight == 2, "Hedges should wait for a free slot"
+
+@pytest.mark.asyncio
+async def test_hedges_are_charged_to_the_scheduler():
+    backend = ScriptedBackend(delays=[0.2, 0.01])
+    hedged = HedgedBackend(backend, hedge_after=0.05)
+    # The first call takes the only request of the minute, so the hedge is never admitted
+    scheduler = LLMScheduler(ConcurrencyLimitedBackend(hedged, max_concurrency=2), requests_per_minute=1)
+    assert await scheduler.generate_content('summarize', 'prompt') == "answer 0"
+    assert hedged.hedges == 1
+    assert len(backend.delays) == 1, "The duplicate call should wait for the rate limit"
+
+    backend = ScriptedBackend(delays=[0.2, 0.01])
+    hedged = HedgedBackend(backend, hedge_after=0.05)
+    scheduler = LLMScheduler(hedged, requests_per_minute=10)
+    assert await scheduler.generate_content('summarize', 'prompt') == "answer 1"
+    assert scheduler.requests.available < 8.1
@@ -0,0 +1,109 @@
+import asyncio
+import pytest
+from content_aggregator import browser
+from content_aggregator.browser import BrowserPool
+from content_aggregator.exceptions import BrowserCrashedError
+
+class FakePage:
+    def __init__(self):
+        self.closed = False
+
+    def is_closed(self):
+        return self.closed
+
+class FakeContext:
+    def __init__(self):
+        self.closed = False
+        self.page = FakePage()
+
+    async def new_page(self):
+        return self.page
+
+    async def close(self):
+        self.closed = True
+        self.page.closed = True
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.contexts = []
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self, **options):
+        context = FakeContext()
+        self.contexts.append(context)
+        return context
+
+    async def close(self):
+        self.connected = False
+
+class FakePlaywright:
+    def __init__(self):
+        self.browsers = []
+        self.chromium = self
+
+    async def launch(self, headless, args):
+        self.browsers.append(FakeBrowser())
+        return self.browsers[-1]
+
+    async def start(self):
+        return self
+
+    async def stop(self):
+        pass
+
+@pytest.fixture
+def playwright(monkeypatch):
+    fake = FakePlaywright()
+    monkeypatch.setattr(browser, 'async_playwright', lambda: fake)
+    return fake
+
+@pytest.mark.asyncio
+async def test_pool_reuses_and_recycles_contexts(playwright):
+    """Test a context is reused between renders and closed after max_navigations"""
+    async with BrowserPool(max_pages=1, max_navigations=2) as pool:
+        pages = []
+        for _ in range(3):
+            async with pool.page() as page:
+                pages.append(page)
+
+        contexts = playwright.browsers[0].contexts
+        assert pages[0] is pages[1], "The context should be reused until its navigation limit"
+        assert pages[2] is not pages[0], "A fresh context should follow a recycled one"
+        assert contexts[0].closed and not contexts[1].closed, "Only the exhausted context should be closed"
+
+@pytest.mark.asyncio
+async def test_pool_relaunches_crashed_browser(playwright):
+    """Test a render failing with a dead browser raises BrowserCrashedError and relaunches"""
+    async with BrowserPool() as pool:
+        with pytest.raises(BrowserCrashedError):
+            async with pool.page():
+                playwright.browsers[0].connected = False
+                raise RuntimeError("Target closed")
+
+        assert playwright.browsers[0].contexts[0].closed, "The failed context should be closed"
+        async with pool.page():
+            pass
+        assert pool.launches == 2, "The browser should be relaunched on the next checkout"
+
+@pytest.mark.asyncio
+async def test_pool_closes_context_of_cancelled_render(playwright):
+    """Test a cancelled render closes its context instead of leaking it"""
+    started = asyncio.Event()
+
+    async def render(pool):
+        async with pool.page():
+            started.set()
+            await asyncio.sleep(10)
+
+    async with BrowserPool() as pool:
+        task = asyncio.create_task(render(pool))
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert playwright.browsers[0].contexts[0].closed, "The cancelled render's context should be closed"
+        assert pool._idle == [], "The cancelled render's context should not be returned to the pool"
@@ -0,0 +1,59 @@
+from content_aggregator.budget import estimate_tokens, fit_to_budget, strip_low_information, truncate_to_tokens
+
+ARTICLE = "\n".join([
+    "Rust 2.0 ships with a new borrow checker",
+    "Share",
+    "The release rewrites the borrow checker to accept more programs while keeping the same safety guarantees.",
+    "Advertisement",
+    "Benchmarks from the compiler team show build times dropping by a fifth on large workspaces.",
+    "The release rewrites the borrow checker to accept more programs while keeping the same safety guarantees.",
+    "Maintainers expect most crates to compile unchanged, with migration lints covering the remaining cases.",
+    "12 comments",
+    "Great news, I have been waiting for this for years and will upgrade today.",
+    "Reply",
+])
+
+def test_estimate_tokens_counts_words_and_punctuation():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("cat") == 1
+    assert estimate_tokens("internationalization") == 5
+    assert estimate_tokens("Hello, world!") == 6
+
+def test_truncate_to_tokens_keeps_the_beginning():
+    text = "word " * 100
+    truncated = truncate_to_tokens(text, 10)
+    assert text.startswith(truncated)
+    assert estimate_tokens(truncated) == 10
+    assert truncate_to_tokens("short text", 10) == "short text"
+
+def test_strip_low_information_drops_boilerplate_duplicates_and_comments():
+    lines = strip_low_information(ARTICLE)
+    assert lines[0] == "Rust 2.0 ships with a new borrow checker"
+    assert "Share" not in lines and "Advertisement" not in lines and "Reply" not in lines
+    assert len([line for line in lines if line.startswith("The release")]) == 1
+    assert lines[-1].startswith("Maintainers expect")
+
+def test_fit_to_budget_respects_budget_and_order():
+    fitted = fit_to_budget(ARTICLE, 45)
+    lines = fitted.split("\n")
+    assert estimate_tokens(fitted) <= 45
+    assert lines[0] == "Rust 2.0 ships with a new borrow checker"
+    original = strip_low_information(ARTICLE)
+    assert [original.index(line) for line in lines] == sorted(original.index(line) for line in lines)
+
+def test_fit_to_budget_returns_whole_text_when_it_fits():
+    assert fit_to_budget("One line.\n\nAnother line.", 100) == "One line.\nAnother line."
+
+def test_fit_to_budget_truncates_a_single_long_line():
+    text = "The storage vendor confirmed the drives were resold after years of use. " * 800
+    fitted = fit_to_budget(text, 4000)
+    assert fitted
+    assert text.strip().startswith(fitted)
+    assert 3900 <= estimate_tokens(fitted) <= 4000
+
+def test_fit_to_budget_falls_back_to_the_beginning_when_no_line_qualifies():
+    text = "\n".join(f"{i} {i + 1} {i + 2} ok" for i in range(200))
+    fitted = fit_to_budget(text, 20)
+    assert fitted
+    assert fitted.startswith("0 1 2 ok")
+    assert estimate_tokens(fitted) <= 20
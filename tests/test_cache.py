@@ -0,0 +1,39 @@
+import pytest
+from content_aggregator.cache import DiskCache, content_key
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = DiskCache(namespace='test', path=str(tmp_path / 'cache.sqlite'), max_entries=2, ttl_seconds=60)
+    yield cache
+    cache.close()
+
+def test_content_key_is_stable_and_part_sensitive():
+    assert content_key('model', 1, 'abc') == content_key('model', 1, 'abc')
+    assert content_key('model', 1, 'abc') != content_key('model', 2, 'abc')
+    assert content_key('ab', 'c') != content_key('a', 'bc')
+
+def test_cache_hit_and_miss_counters(cache):
+    assert cache.get('missing') is None
+    cache.set('key', {'summary': 'cached'})
+    assert cache.get('key') == {'summary': 'cached'}
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'entries': 1}
+
+def test_cache_evicts_least_recently_used(cache):
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+
+def test_cache_expires_entries_after_ttl(cache):
+    cache.ttl_seconds = 0
+    cache.set('key', 'value')
+    assert cache.get('key') is None
+
+def test_cache_namespaces_are_isolated(cache, tmp_path):
+    other = DiskCache(namespace='other', path=cache.path)
+    cache.set('key', 'mine')
+    assert other.get('key') is None
+    other.close()
@@ -0,0 +1,41 @@
+import time
+from content_aggregator.canonical import UrlCanonicalizer, canonical_url
+
+def test_canonical_url_collapses_common_variants():
+    variants = [
+        'https://blog.example.com/post',
+        'HTTP://Blog.Example.com:80/post/',
+        'https://www.blog.example.com/post#comments',
+        'https://blog.example.com/post?utm_source=hn&utm_medium=social',
+        'https://blog.example.com/post?fbclid=abc',
+        'https://blog.example.com/post/amp',
+        'https://blog.example.com/amp/post',
+        'https://blog.example.com:443/post',
+    ]
+    assert {canonical_url(url) for url in variants} == {'https://blog.example.com/post'}
+
+def test_canonical_url_keeps_and_sorts_meaningful_params():
+    assert canonical_url('https://example.com/post?page=2&id=1&utm_campaign=x') == 'https://example.com/post?id=1&page=2'
+    assert canonical_url('http://example.com') == 'https://example.com/'
+    assert canonical_url('https://example.com/story.amp.html') == 'https://example.com/story.html'
+    assert canonical_url('https://example.com/campaign') == 'https://example.com/campaign'
+
+def test_domain_rules_apply_to_subdomains():
+    assert canonical_url('https://news.ycombinator.com/item?id=42&p=2') == 'https://news.ycombinator.com/item?id=42'
+    assert canonical_url('https://eng.substack.com/p/launch?r=abc&s=w') == 'https://eng.substack.com/p/launch'
+
+def test_custom_rules_override_defaults():
+    canonicalizer = UrlCanonicalizer({'example.com': {'keep_www': True, 'drop_params': ['session']}})
+    assert canonicalizer.canonicalize('https://www.example.com/a?session=1&q=x') == 'https://www.example.com/a?q=x'
+    assert canonicalizer.canonicalize('https://docs.example.com/a/') == 'https://docs.example.com/a'
+
+def test_canonicalizer_memoizes_repeated_urls():
+    canonicalizer = UrlCanonicalizer()
+    urls = [f'https://example.com/post/{i}?utm_source=feed' for i in range(20000)]
+    for url in urls:
+        canonicalizer.canonicalize(url)
+    start = time.perf_counter()
+    for url in urls:
+        canonicalizer.canonicalize(url)
+    assert time.perf_counter() - start < 0.05
+    assert canonicalizer.cache_info().hits == len(urls)
@@ -0,0 +1,35 @@
+import os
+import pytest
+from content_aggregator.checkpoint import RunCheckpoint
+
+@pytest.fixture
+def checkpoint(tmp_path):
+    checkpoint = RunCheckpoint('test_run', path=str(tmp_path / 'checkpoint.sqlite'))
+    yield checkpoint
+    checkpoint.close()
+
+def test_gathered_articles_round_trip_in_order(checkpoint):
+    assert checkpoint.load_gathered() is None
+    articles = [{'url': f'https://a.example.com/{i}', 'title': None} for i in range(3)]
+    checkpoint.save_gathered(articles)
+    assert checkpoint.load_gathered() == articles
+
+def test_scraped_content_distinguishes_empty_from_missing(checkpoint):
+    checkpoint.save_scraped('https://a.example.com/1?utm_source=rss', 'article text')
+    checkpoint.save_scraped('https://a.example.com/2', '')
+    assert checkpoint.scraped_content('https://a.example.com/1') == 'article text'
+    assert checkpoint.scraped_content('https://a.example.com/2') == ''
+    assert checkpoint.scraped_content('https://a.example.com/3') is None
+
+def test_summary_status_survives_reopening(tmp_path):
+    path = str(tmp_path / 'checkpoint.sqlite')
+    checkpoint = RunCheckpoint('test_run', path=path)
+    checkpoint.mark_summarized('https://a.example.com/1', 'done')
+    checkpoint.mark_summarized('https://a.example.com/2', 'duplicate')
+    checkpoint.close()
+
+    reopened = RunCheckpoint('test_run', path=path)
+    assert reopened.summarized_urls() == {'https://a.example.com/1', 'https://a.example.com/2'}
+    assert reopened.summarized_urls('duplicate') == {'https://a.example.com/2'}
+    reopened.delete()
+    assert not os.path.exists(path)
@@ -0,0 +1,72 @@
+import asyncio
+import pytest
+from content_aggregator.crawler import BloomFilter, HostThrottle, IndexCrawler, UrlFilter
+from content_aggregator.extraction import HtmlExtractor
+
+def test_bloom_filter_has_no_false_negatives_and_few_false_positives():
+    bloom = BloomFilter(capacity=2000, error_rate=0.01)
+    urls = [f"https://example.com/post/{i}" for i in range(2000)]
+    for url in urls:
+        bloom.add(url)
+    assert all(url in bloom for url in urls)
+    assert not bloom.add(urls[0])
+    false_positives = sum(f"https://other.example.com/{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+
+def test_url_filter_applies_include_then_exclude():
+    url_filter = UrlFilter(include_patterns=['/blog/', '/posts/'], exclude_patterns=['?page=', '.pdf'])
+    assert url_filter("https://example.com/blog/one")
+    assert url_filter("https://example.com/posts/two")
+    assert not url_filter("https://example.com/about")
+    assert not url_filter("https://example.com/blog/?page=2")
+    assert UrlFilter()("https://example.com/anything")
+
+@pytest.mark.asyncio
+async def test_host_throttle_spaces_requests_per_host():
+    throttle = HostThrottle(delay=0.05)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await asyncio.gather(*(throttle.wait("https://a.example.com/x") for _ in range(3)), throttle.wait("https://b.example.com/x"))
+    assert 0.1 <= loop.time() - start < 0.2
+
+def _site():
+    """Index with two pages of pagination linking to posts, one of them repeated"""
+    pages = {}
+    for page in range(1, 4):
+        posts = "".join(f'<a class="post" href="/posts/{page}-{i}">post</a>' for i in range(2))
+        next_link = f'<a class="next" href="/?page={page + 1}">next</a>' if page < 3 else ""
+        pages[f"https://blog.example.com/?page={page}"] = f"<html><body>{posts}<a class='post' href='/posts/1-0'>again</a>{next_link}<a class='next' href='https://elsewhere.example.com/'>away</a></body></html>"
+    return pages
+
+@pytest.mark.asyncio
+async def test_crawler_follows_index_pages_to_max_depth_once():
+    pages = _site()
+    fetched = []
+    async def fetch_html(url):
+        fetched.append(url)
+        return pages.get(url, "<html></html>")
+    extractor = HtmlExtractor(parser='html.parser', max_workers=0)
+    seen_pages = BloomFilter(capacity=1000)
+
+    def crawler(max_depth):
+        return IndexCrawler(fetch_html, extractor.links, seen_pages, HostThrottle(0), max_depth=max_depth)
+
+    urls = await crawler(max_depth=1).crawl("https://blog.example.com/?page=1", css_selector="a.post", follow_selector="a.next")
+    assert urls == [f"https://blog.example.com/posts/{page}-{i}" for page in (1, 2) for i in range(2)]
+    assert fetched == ["https://blog.example.com/?page=1", "https://blog.example.com/?page=2"]
+
+    # Page 2 was already rendered in this run, so a second crawl stops there
+    fetched.clear()
+    urls = await crawler(max_depth=5).crawl("https://blog.example.com/?page=1", css_selector="a.post", follow_selector="a.next")
+    assert fetched == ["https://blog.example.com/?page=1"]
+    assert urls == ["https://blog.example.com/posts/1-0", "https://blog.example.com/posts/1-1"]
+
+@pytest.mark.asyncio
+async def test_crawler_without_follow_selector_reads_only_the_root():
+    pages = _site()
+    async def fetch_html(url):
+        return pages[url]
+    extractor = HtmlExtractor(parser='html.parser', max_workers=0)
+    crawler = IndexCrawler(fetch_html, extractor.links, BloomFilter(capacity=100), HostThrottle(0), max_depth=3)
+    urls = await crawler.crawl("https://blog.example.com/?page=1", css_selector="a.post", url_filter=UrlFilter(exclude_patterns=['1-1']))
+    assert urls == ["https://blog.example.com/posts/1-0"]
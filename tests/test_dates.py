@@ -0,0 +1,106 @@
+import asyncio
+from datetime import datetime, timezone
+import httpx
+import pytest
+from content_aggregator.dates import (
+    DateExtractor, date_from_json_ld, date_from_meta, date_from_time_tag, date_from_url, parse_date, parse_sitemap
+)
+from content_aggregator.http_client import HttpClient
+
+def _ts(*args):
+    return int(datetime(*args, tzinfo=timezone.utc).timestamp())
+
+def test_parse_date_formats_and_plausibility():
+    assert parse_date("2025-01-31T08:30:00Z") == _ts(2025, 1, 31, 8, 30)
+    assert parse_date("2025-01-31T16:30:00+08:00") == _ts(2025, 1, 31, 8, 30)
+    assert parse_date("Fri, 31 Jan 2025 08:30:00 GMT") == _ts(2025, 1, 31, 8, 30)
+    # A bare date counts as the end of that day
+    assert parse_date("2025-01-31") == _ts(2025, 1, 31, 23, 59, 59)
+    assert parse_date("1970-01-01") is None
+    assert parse_date("2999-01-01") is None
+    assert parse_date("yesterday") is None
+
+def test_html_signals():
+    json_ld = '''<script type="application/ld+json">{"@context": "https://schema.org",
+        "@graph": [{"@type": "WebSite"}, {"@type": "BlogPosting", "datePublished": "2025-02-01T10:00:00Z"}]}</script>'''
+    assert date_from_json_ld(json_ld) == _ts(2025, 2, 1, 10)
+    assert date_from_json_ld('<script type="application/ld+json">{broken</script>') is None
+
+    meta = '<meta name="date" content="2024-01-01"><meta content="2025-02-01T10:00:00Z" property="article:published_time">'
+    assert date_from_meta(meta) == _ts(2025, 2, 1, 10)
+
+    assert date_from_time_tag('<time>soon</time><time class="x" datetime="2025-02-01T10:00:00Z">Feb 1</time>') == _ts(2025, 2, 1, 10)
+
+def test_url_patterns():
+    assert date_from_url("https://example.com/2025/02/01/some-post/") == _ts(2025, 2, 1, 23, 59, 59)
+    assert date_from_url("https://example.com/blog/2025-02-01-some-post") == _ts(2025, 2, 1, 23, 59, 59)
+    assert date_from_url("https://example.com/p/20250201/") == _ts(2025, 2, 1, 23, 59, 59)
+    assert date_from_url("https://example.com/posts/12345678") is None
+    assert date_from_url("https://example.com/2025/13/01/") is None
+
+def test_parse_sitemap_pages_and_index():
+    pages, children = parse_sitemap(
+        "<urlset><url><loc>https://example.com/a?utm_source=x</loc><lastmod>2025-02-01</lastmod></url>"
+        "<url><loc>https://example.com/b</loc></url></urlset>"
+    )
+    assert pages == {"https://example.com/a": _ts(2025, 2, 1, 23, 59, 59)}
+    assert children == []
+    _, children = parse_sitemap("<sitemapindex><sitemap><loc>https://example.com/posts.xml</loc></sitemap></sitemapindex>")
+    assert children == [("https://example.com/posts.xml", None)]
+
+@pytest.mark.asyncio
+async def test_cascade_uses_the_llm_only_as_a_last_resort():
+    requests = []
+    def handler(request):
+        requests.append(str(request.url))
+        path = request.url.path
+        if path == '/sitemap.xml':
+            return httpx.Response(200, text="<sitemapindex><sitemap><loc>https://blog.example.com/posts.xml</loc></sitemap></sitemapindex>")
+        if path == '/posts.xml':
+            return httpx.Response(200, text="<urlset><url><loc>https://blog.example.com/in-sitemap</loc><lastmod>2025-02-03</lastmod></url></urlset>")
+        if path == '/with-meta':
+            return httpx.Response(200, text='<html><head><meta property="article:published_time" content="2025-02-01T00:00:00Z"></head></html>', headers={'Content-Type': 'text/html'})
+        return httpx.Response(200, text="<html><body>No dates here</body></html>", headers={'Content-Type': 'text/html'})
+    llm_calls = []
+    async def llm_extract(html):
+        llm_calls.append(html)
+        return "2025-02-04"
+
+    async with HttpClient(transport=httpx.MockTransport(handler)) as http:
+        dates = DateExtractor(http, llm_extract=llm_extract)
+        articles = [{'url': f"https://blog.example.com/{path}"} for path in ('with-meta', '2025/02/02/in-url', 'in-sitemap', 'nowhere')]
+        await dates.annotate(articles)
+
+    assert [article['publish_at'] for article in articles] == [
+        _ts(2025, 2, 1), _ts(2025, 2, 2, 23, 59, 59), _ts(2025, 2, 3, 23, 59, 59), _ts(2025, 2, 4, 23, 59, 59)
+    ]
+    assert len(llm_calls) == 1
+    assert requests.count("https://blog.example.com/sitemap.xml") == 1
+
+@pytest.mark.asyncio
+async def test_annotate_leaves_links_undated_after_timeout():
+    async def handler(request):
+        if request.url.path == '/slow':
+            await asyncio.sleep(5)
+        if request.url.path == '/sitemap.xml':
+            return httpx.Response(404)
+        return httpx.Response(200, text='<html><time datetime="2025-02-01T00:00:00Z"></time></html>', headers={'Content-Type': 'text/html'})
+
+    async with HttpClient(transport=httpx.MockTransport(handler)) as http:
+        dates = DateExtractor(http)
+        articles = [{'url': "https://blog.example.com/fast"}, {'url': "https://blog.example.com/slow"}]
+        await dates.annotate(articles, timeout=0.1)
+
+    assert [article['publish_at'] for article in articles] == [_ts(2025, 2, 1), None]
+
+@pytest.mark.asyncio
+async def test_pages_are_read_through_fetch_html():
+    fetched = []
+    async def fetch_html(url):
+        fetched.append(url)
+        return b'<html><time datetime="2025-02-01T00:00:00Z"></time></html>'
+
+    async with HttpClient(transport=httpx.MockTransport(lambda request: httpx.Response(500))) as http:
+        dates = DateExtractor(http, fetch_html=fetch_html)
+        assert await dates.publication_date("https://blog.example.com/post") == _ts(2025, 2, 1)
+    assert fetched == ["https://blog.example.com/post"]
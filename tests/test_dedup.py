@@ -0,0 +1,32 @@
+from content_aggregator.dedup import NearDuplicateIndex, hamming_distance, simhash
+
+STORY = (
+    "OpenAI and Microsoft announced a new agreement on Tuesday that extends their partnership through 2030. "
+    "Under the deal Microsoft keeps exclusive rights to sell the models through its cloud, while OpenAI gains "
+    "the freedom to buy compute from other providers. Analysts expect the change to ease capacity shortages "
+    "that slowed product launches last year, and both companies said revenue sharing terms are unchanged."
+)
+SYNDICATED = "Reposted from the company blog.\n" + STORY.replace("on Tuesday", "this Tuesday") + "\nShare this story"
+OTHER_STORY = (
+    "The Rust compiler team released version 2.0 with a rewritten borrow checker that accepts more programs. "
+    "Benchmarks show build times falling by a fifth on large workspaces, and maintainers expect most crates "
+    "to compile unchanged. Migration lints cover the remaining cases, and the old checker stays available "
+    "behind a flag for one release so projects can compare diagnostics before switching over."
+)
+
+def test_simhash_is_close_for_near_duplicates():
+    assert hamming_distance(simhash(STORY), simhash(SYNDICATED)) < hamming_distance(simhash(STORY), simhash(OTHER_STORY))
+    assert simhash(STORY) == simhash(STORY.upper())
+
+def test_index_returns_first_representative_of_a_group():
+    index = NearDuplicateIndex(max_distance=8)
+    assert index.add('a', STORY) is None
+    assert index.add('b', OTHER_STORY) is None
+    assert index.add('c', SYNDICATED) == 'a'
+    assert index.add('d', STORY) == 'a'
+    assert len(index) == 2
+
+def test_index_ignores_short_texts():
+    index = NearDuplicateIndex()
+    assert index.add('a', "Too short to judge") is None
+    assert index.add('b', "Too short to judge") is None
@@ -0,0 +1,58 @@
+import asyncio
+import pytest
+from content_aggregator.discovery import FairShareAllocator, SourceDiscovery
+
+def test_allocator_admits_fair_shares_and_redistributes_unused_budget():
+    allocator = FairShareAllocator(budget=9, sources=['a', 'b', 'c'])
+    assert allocator.offer('a', list(range(10))) == [0, 1, 2]
+    # b found fewer than its share, so its unused two go to a
+    assert allocator.offer('b', ['b0']) == ['b0', 3, 4]
+    assert allocator.offer('c', ['c0', 'c1', 'c2', 'c3']) == ['c0', 'c1', 'c2']
+    assert allocator.finish() == []
+    assert allocator.admitted == 9
+
+def test_allocator_gives_released_budget_to_the_least_served_source():
+    allocator = FairShareAllocator(budget=6, sources=['a', 'b', 'c'])
+    assert allocator.offer('a', ['a0', 'a1', 'a2', 'a3']) == ['a0', 'a1']
+    assert allocator.offer('b', ['b0', 'b1', 'b2', 'b3']) == ['b0', 'b1']
+    # c never reports, its share is split between a and b
+    assert allocator.finish() == ['a2', 'b2']
+    assert allocator.admitted == 6
+
+def test_allocator_never_exceeds_budget_with_more_sources_than_articles():
+    allocator = FairShareAllocator(budget=2, sources=['a', 'b', 'c'])
+    admitted = allocator.offer('c', ['c0', 'c1']) + allocator.offer('a', ['a0']) + allocator.offer('b', ['b0'])
+    admitted += allocator.finish()
+    assert len(admitted) == 2
+
+@pytest.mark.asyncio
+async def test_discovery_streams_sources_as_they_finish_and_skips_stuck_ones():
+    async def extract(source_url, delay, articles=(), fail=False):
+        await asyncio.sleep(delay)
+        if fail:
+            raise RuntimeError("broken feed")
+        return [{'url': f"{source_url}/{i}"} for i in range(articles)]
+    sources = [
+        {'source_url': 'https://slow.example.com', 'delay': 0.05, 'articles': 3},
+        {'source_url': 'https://fast.example.com', 'delay': 0.0, 'articles': 3},
+        {'source_url': 'https://stuck.example.com', 'delay': 10},
+        {'source_url': 'https://broken.example.com', 'delay': 0.1, 'fail': True},
+    ]
+    discovery = SourceDiscovery(extract, budget=4, source_timeout=0.2, total_timeout=5)
+
+    start = asyncio.get_running_loop().time()
+    urls = [article['url'] async for article in discovery.stream(sources)]
+
+    assert asyncio.get_running_loop().time() - start < 1
+    # One article each up front, then the shares released by the broken and stuck sources in turn
+    assert urls == ['https://fast.example.com/0', 'https://slow.example.com/0', 'https://fast.example.com/1', 'https://slow.example.com/1']
+
+@pytest.mark.asyncio
+async def test_discovery_stops_at_the_global_deadline():
+    async def extract(source_url, delay):
+        await asyncio.sleep(delay)
+        return [{'url': source_url}]
+    sources = [{'source_url': 'https://a.example.com', 'delay': 0.0}, {'source_url': 'https://b.example.com', 'delay': 10}]
+    discovery = SourceDiscovery(extract, budget=10, source_timeout=20, total_timeout=0.1)
+
+    assert [article['url'] async for article in discovery.stream(sources)] == ['https://a.example.com']
@@ -0,0 +1,35 @@
+import pytest
+from content_aggregator.extraction import HtmlExtractor, available_parsers, extract_links, extract_main_text
+
+PAGE = b"""<html><head><title>Post</title><style>p {}</style></head><body>
+<nav><a href="/">Home</a></nav>
+<div class="post"><h1>Title</h1><p>First paragraph.</p><p>Second <b>bold</b> paragraph.</p>
+<script>track()</script><a class="more link" href="/next">Next</a></div>
+<footer>Footer text</footer></body></html>"""
+
+@pytest.mark.parametrize("parser", available_parsers())
+def test_extract_main_text_backends_agree(parser):
+    text = extract_main_text(PAGE, parser)
+    assert text.split('\n')[:3] == ['Title', 'First paragraph.', 'Second']
+    assert 'track()' not in text
+    assert 'Footer text' not in text
+    assert 'Home' not in text
+
+@pytest.mark.parametrize("parser", available_parsers())
+def test_extract_links_backends_agree(parser):
+    assert extract_links(PAGE, parser=parser) == ['/', '/next']
+    assert extract_links(PAGE, css_selector='div.post a[href]', parser=parser) == ['/next']
+    assert extract_links(PAGE, class_name='more', parser=parser) == ['/next']
+
+def test_extractor_rejects_unknown_parser():
+    with pytest.raises(ValueError):
+        HtmlExtractor(parser='regex')
+
+@pytest.mark.asyncio
+async def test_extractor_process_pool_matches_inline():
+    pooled = HtmlExtractor(parser='html.parser', max_workers=1)
+    inline = HtmlExtractor(parser='html.parser', max_workers=0)
+    try:
+        assert await pooled.main_text(PAGE) == await inline.main_text(PAGE)
+    finally:
+        pooled.close()
@@ -1,5 +1,8 @@
 import pytest
+from content_aggregator.backends import LocalBackend
+from content_aggregator.exceptions import RateLimitExceededError
 from content_aggregator.llm import LLMProcessor
+from content_aggregator.structured import BATCH_SCHEMA, SUMMARY_SCHEMA
 
 # NOTE: these test reqire GEMINI_API_KEY environment variable and will fire api calls
 
@@ -36,4 +39,115 @@ async def test_live_summarize_all(live_processor):
     result = await live_processor.summarize_all(input_summaries)
     
     assert len(result) > 100  # Should generate substantial summary
-    assert any(word in result.lower() for word in ["insights", "trends", "implications"]) 
\ No newline at end of file
+    assert any(word in result.lower() for word in ["insights", "trends", "implications"]) 
+
+@pytest.fixture
+def offline_processor(tmp_path, monkeypatch):
+    """LLMProcessor on the local backend with an isolated cache, for tests that stub the model"""
+    monkeypatch.setenv('CACHE_DIR', str(tmp_path))
+    return LLMProcessor(backend=LocalBackend())
+
+def _tagged(title):
+    return f"<tags>test</tags><date>2025-02-01</date><author>someone</author><title>{title}</title><summary>About {title}</summary>"
+
+@pytest.mark.asyncio
+async def test_summarize_many_batches_short_posts(offline_processor, monkeypatch):
+    prompts = []
+    async def fake_generate(model_key, prompt, temperature=0.2, max_tokens=None, priority=None, response_schema=None):
+        prompts.append(prompt)
+        if "=== Article 2 ===" in prompt:
+            # Article 2 is missing from the batched answer and must fall back to its own request
+            return f'<article id="1">{_tagged("first")}</article><article id="3">{_tagged("third")}</article>'
+        return _tagged("second")
+    monkeypatch.setattr(offline_processor.scheduler, 'generate_content', fake_generate)
+    
+    posts = [("first post", "https://a.example.com/1"), ("second post", "https://a.example.com/2"), ("third post", "https://a.example.com/3")]
+    results = await offline_processor.summarize_many(posts)
+    
+    assert [result['url'] for result in results] == [url for _, url in posts]
+    assert [result['title'] for result in results] == ["first", "second", "third"]
+    assert len(prompts) == 2
+    
+    # Every summary is now cached, so a rerun makes no requests
+    assert [result['title'] for result in await offline_processor.summarize_many(posts)] == ["first", "second", "third"]
+    assert len(prompts) == 2
+
+@pytest.mark.asyncio
+async def test_truncated_json_batch_only_refetches_the_cut_off_article(offline_processor, monkeypatch):
+    calls = []
+    async def fake_generate(model_key, prompt, temperature=0.2, max_tokens=None, priority=None, response_schema=None):
+        calls.append(response_schema)
+        if "=== Article 2 ===" in prompt:
+            # The answer was cut off inside the third article's summary
+            return ('[{"id": 1, "tags": "test", "date": "2025-02-01", "author": "a", "title": "first", "summary": "About first"},'
+                    ' {"id": 2, "tags": "test", "date": "unknown", "author": "b", "title": "second", "summary": "About second"},'
+                    ' {"id": 3, "tags": "test", "title": "third", "summ')
+        return '{"tags": "test", "date": "unknown", "author": "c", "title": "third", "summary": "About third"}'
+    monkeypatch.setattr(offline_processor.scheduler, 'generate_content', fake_generate)
+
+    posts = [("first post", "https://a.example.com/1"), ("second post", "https://a.example.com/2"), ("third post", "https://a.example.com/3")]
+    results = await offline_processor.summarize_many(posts)
+
+    assert [result['summary'] for result in results] == ["About first", "About second", "About third"]
+    assert results[0]['date'] == "2025-02-01"
+    assert calls == [BATCH_SCHEMA, SUMMARY_SCHEMA]
+
+def test_parse_response_keeps_partial_fields(offline_processor):
+    result = offline_processor._parse_response('{"title": "Cut short", "summary": "Mostly there', "https://a.example.com/1")
+    assert result['title'] == "Cut short"
+    assert result['summary'] == "Mostly there"
+    assert result['author'] == offline_processor.UNKNOWN
+    assert offline_processor._parse_response('{"title": "No summary"', "https://a.example.com/2")['summary'] == offline_processor.NO_SUMMARY
+
+def test_plan_batches_respects_token_budget(offline_processor):
+    offline_processor.batch_config.update(max_posts=3, token_budget=100, short_post_tokens=60)
+    pending = [(i, "x" * 4 * tokens, f"url{i}", f"key{i}") for i, tokens in enumerate([50, 40, 30, 80, 10, 10, 10, 10])]
+    
+    batches = offline_processor._plan_batches(pending)
+    
+    assert [[item[0] for item in batch] for batch in batches] == [[0, 1], [3], [2, 4, 5], [6, 7]]
+
+@pytest.mark.asyncio
+async def test_summarize_all_map_reduces_large_inputs(offline_processor, monkeypatch):
+    prompts = []
+    async def fake_generate(model_key, prompt, temperature=0.2, max_tokens=None, priority=None, response_schema=None):
+        prompts.append(prompt)
+        return "condensed" if prompt.startswith("Condense") else "executive summary"
+    monkeypatch.setattr(offline_processor.scheduler, 'generate_content', fake_generate)
+    offline_processor.executive_config['chunk_tokens'] = 40
+    summaries = [f"summary number {i} " * 4 for i in range(10)]  # ~20 tokens each
+    
+    assert await offline_processor.summarize_all(summaries) == "executive summary"
+    condense_calls = [prompt for prompt in prompts if prompt.startswith("Condense")]
+    assert len(condense_calls) == 10
+    assert len(prompts) == 11
+    
+    # Chunk and final results are cached
+    assert await offline_processor.summarize_all(summaries) == "executive summary"
+    assert len(prompts) == 11
+
+def test_chunk_by_tokens(offline_processor):
+    chunks = offline_processor._chunk_by_tokens(["a" * 40, "b" * 40, "c" * 400, "d"], token_budget=25)
+    assert chunks == [["a" * 40, "b" * 40], ["c" * 400], ["d"]]
+
+@pytest.mark.asyncio
+async def test_summarize_many_raises_once_rate_limit_retries_are_spent(tmp_path, monkeypatch):
+    class RateLimitedBackend(LocalBackend):
+        RETRY_AFTER_DEFAULT = 0
+        calls = 0
+        async def generate_content(self, model_key, prompt, temperature=0.2, max_tokens=None, response_schema=None):
+            self.calls += 1
+            raise RateLimitExceededError(retry_after=0)
+    monkeypatch.setenv('CACHE_DIR', str(tmp_path))
+    monkeypatch.setenv('GEMINI_MAX_RETRIES', '1')
+    backend = RateLimitedBackend()
+    processor = LLMProcessor(backend=backend)
+    
+    posts = [("first post", "https://a.example.com/1"), ("second post", "https://a.example.com/2")]
+    with pytest.raises(RateLimitExceededError):
+        await processor.summarize_many(posts)
+    # One batched request retried once, without falling back to single requests
+    assert backend.calls == 2
+    
+    with pytest.raises(RateLimitExceededError):
+        await processor.summarize_post("first post", "https://a.example.com/1")
@@ -0,0 +1,52 @@
+import json
+import pytest
+from content_aggregator.metrics import Metrics, percentile
+
+def test_percentile_uses_nearest_rank():
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 0.5) == 50.0
+    assert percentile(values, 0.95) == 95.0
+    assert percentile([3.0], 0.95) == 3.0
+    assert percentile([], 0.5) == 0.0
+
+def test_summary_breaks_stages_down_by_domain():
+    metrics = Metrics()
+    metrics.record('scrape.static', 0.1, 'a.example.com', bytes=1000)
+    metrics.record('scrape.static', 0.3, 'a.example.com', bytes=500)
+    metrics.record('scrape.static', 0.2, 'b.example.com', bytes=200)
+
+    stage = metrics.summary()['stages']['scrape.static']
+    assert stage['count'] == 3
+    assert stage['bytes'] == 1700
+    assert stage['max_s'] == 0.3
+    assert stage['p50_s'] == 0.2
+    assert stage['domains']['a.example.com']['count'] == 2
+    assert stage['domains']['b.example.com']['bytes'] == 200
+
+def test_timer_records_counters_and_errors():
+    metrics = Metrics()
+    with metrics.timer('llm.generate', 'summarize') as sample:
+        sample['tokens_in'] = 120
+        sample['tokens_out'] = 40
+    with pytest.raises(ValueError):
+        with metrics.timer('llm.generate', 'summarize'):
+            raise ValueError("boom")
+
+    stage = metrics.summary()['stages']['llm.generate']
+    assert stage['count'] == 2
+    assert stage['tokens_in'] == 120
+    assert stage['errors'] == 1
+
+def test_exports_json_and_prometheus(tmp_path):
+    metrics = Metrics()
+    metrics.record('feed.fetch', 0.25, 'a.example.com', bytes=2048)
+
+    metrics.write_json(str(tmp_path / 'metrics.json'))
+    assert json.loads((tmp_path / 'metrics.json').read_text())['stages']['feed.fetch']['bytes'] == 2048
+
+    metrics.write_prometheus(str(tmp_path / 'metrics.prom'))
+    text = (tmp_path / 'metrics.prom').read_text()
+    assert 'content_aggregator_stage_seconds{stage="feed.fetch",quantile="0.95"} 0.250000' in text
+    assert 'content_aggregator_stage_seconds_count{stage="feed.fetch"} 1' in text
+    assert 'content_aggregator_bytes_total{stage="feed.fetch"} 2048' in text
+    assert 'a.example.com' not in text
@@ -0,0 +1,75 @@
+import asyncio
+import pytest
+from content_aggregator.pipeline import Pipeline, Stage
+
+@pytest.mark.asyncio
+async def test_items_flow_through_every_stage():
+    seen = []
+    async def double(item):
+        return item * 2
+    async def drop_odd_batch(items):
+        return [item if item % 4 == 0 else None for item in items]
+    async def collect(item):
+        seen.append(item)
+    pipeline = Pipeline([
+        Stage('double', double, workers=2, queue_size=1),
+        Stage('filter', drop_odd_batch, queue_size=4, batch_size=3),
+        Stage('collect', collect),
+    ])
+
+    await pipeline.run(range(10))
+
+    assert sorted(seen) == [0, 4, 8, 12, 16]
+
+@pytest.mark.asyncio
+async def test_bounded_queues_hold_back_the_source():
+    fed = []
+    release = asyncio.Event()
+    async def source():
+        for i in range(20):
+            fed.append(i)
+            yield i
+    async def slow(item):
+        await release.wait()
+    pipeline = Pipeline([Stage('slow', slow, queue_size=2)])
+
+    run = asyncio.create_task(pipeline.run(source()))
+    await asyncio.sleep(0.05)
+    # One item in the worker, two queued and one waiting to be queued
+    assert len(fed) == 4
+    release.set()
+    await run
+    assert len(fed) == 20
+
+@pytest.mark.asyncio
+async def test_submit_sends_items_back_to_an_earlier_stage():
+    attempts = {}
+    results = []
+    async def fetch(item):
+        attempts[item] = attempts.get(item, 0) + 1
+        return item
+    async def check(item):
+        if attempts[item] == 1:
+            pipeline.submit('fetch', item)
+            return None
+        results.append(item)
+    pipeline = Pipeline([Stage('fetch', fetch, queue_size=1), Stage('check', check, queue_size=1)])
+
+    await pipeline.run([1, 2, 3])
+
+    assert sorted(results) == [1, 2, 3]
+    assert attempts == {1: 2, 2: 2, 3: 2}
+
+@pytest.mark.asyncio
+async def test_failures_drop_items_and_source_errors_propagate():
+    async def explode(item):
+        raise ValueError("bad item")
+    await Pipeline([Stage('explode', explode)]).run([1, 2])
+
+    async def broken_source():
+        yield 1
+        raise RuntimeError("discovery failed")
+    async def passthrough(item):
+        return item
+    with pytest.raises(RuntimeError):
+        await Pipeline([Stage('passthrough', passthrough)]).run(broken_source())
@@ -0,0 +1,25 @@
+import pytest
+from content_aggregator.run_state import ProcessedIndex
+
+@pytest.fixture
+def index(tmp_path):
+    index = ProcessedIndex(path=str(tmp_path / 'run_state.sqlite'))
+    yield index
+    index.close()
+
+def test_filter_new_skips_processed_urls(index):
+    index.mark_processed('https://Blog.example.com/post1/', 'hash1')
+    articles = [
+        {'url': 'https://blog.example.com/post1'},
+        {'url': 'https://blog.example.com/post2'},
+    ]
+    assert index.filter_new(articles) == [{'url': 'https://blog.example.com/post2'}]
+    assert index.is_processed('https://blog.example.com/post1#comments')
+    assert not index.is_processed('https://blog.example.com/post2')
+
+def test_last_run_only_counts_finished_runs(index):
+    assert index.last_run_started_at() is None
+    index.start_run('run-1')
+    assert index.last_run_started_at() is None
+    index.finish_run('run-1')
+    assert index.last_run_started_at() is not None
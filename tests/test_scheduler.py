@@ -0,0 +1,54 @@
+import asyncio
+import pytest
+from content_aggregator.exceptions import RateLimitExceededError
+from content_aggregator.scheduler import LLMScheduler, TokenBucket, PRIORITY_HIGH, PRIORITY_LOW
+
+class FakeClient:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.calls = []
+
+    async def generate_content(self, model_key, prompt, temperature=0.2, max_tokens=None, response_schema=None):
+        self.calls.append(prompt)
+        if self.failures > 0:
+            self.failures -= 1
+            raise RateLimitExceededError(retry_after=0.01)
+        return f"response to {prompt}"
+
+def test_token_bucket_delay():
+    bucket = TokenBucket(capacity=60, period=60)
+    assert bucket.delay(10) == 0
+    bucket.consume(60)
+    assert bucket.delay(1) == pytest.approx(1.0, abs=0.05)
+
+@pytest.mark.asyncio
+async def test_scheduler_serves_by_priority():
+    client = FakeClient()
+    scheduler = LLMScheduler(client, requests_per_minute=6000)
+    scheduler.requests.consume(scheduler.requests.capacity)  # force callers to queue up
+
+    low = asyncio.create_task(scheduler.generate_content('summarize', 'low', priority=PRIORITY_LOW))
+    await asyncio.sleep(0)
+    high = asyncio.create_task(scheduler.generate_content('summarize', 'high', priority=PRIORITY_HIGH))
+    await asyncio.gather(low, high)
+
+    assert client.calls == ['high', 'low']
+
+@pytest.mark.asyncio
+async def test_scheduler_retries_rate_limits_with_shared_cooldown():
+    client = FakeClient(failures=2)
+    scheduler = LLMScheduler(client, base_delay=0.01, max_delay=0.05)
+
+    result = await scheduler.generate_content('summarize', 'prompt')
+
+    assert result == "response to prompt"
+    assert len(client.calls) == 3
+
+@pytest.mark.asyncio
+async def test_scheduler_gives_up_after_max_retries():
+    client = FakeClient(failures=5)
+    scheduler = LLMScheduler(client, max_retries=1, base_delay=0.01, max_delay=0.01)
+
+    with pytest.raises(RateLimitExceededError):
+        await scheduler.generate_content('summarize', 'prompt')
+    assert len(client.calls) == 2
@@ -1,9 +1,18 @@
 import pytest
+import pytest_asyncio
+import httpx
+import sys
+from pathlib import Path
 from content_aggregator.scraper import Scraper
 
-@pytest.fixture(scope="module")
-def scraper():
-    return Scraper()
+# The benchmark fixture site's helpers are shared with these tests
+sys.path.insert(0, str(Path(__file__).parent.parent / 'benchmarks'))
+from fixture_server import make_pdf  # noqa: E402
+
+@pytest_asyncio.fixture
+async def scraper():
+    async with Scraper() as scraper:
+        yield scraper
 
 @pytest.mark.external
 @pytest.mark.asyncio
@@ -54,4 +63,169 @@ async def test_article_scraping(scraper):
     
     # Test problematic URL (captcha)
     captcha_content = await scraper.scrape_article("https://www.reuters.com/world/us/trump-admin-take-down-most-government-websites-5-pm-cbs-reports-2025-01-31/")
-    assert len(captcha_content) < 100 or "captcha" in captcha_content.lower(), "Should handle CAPTCHA pages"
\ No newline at end of file
+    assert len(captcha_content) < 100 or "captcha" in captcha_content.lower(), "Should handle CAPTCHA pages"
+
+def test_scan_feed_entry_ids(tmp_path, monkeypatch):
+    """Test the cheap pre-parse scan of RSS guids and Atom ids"""
+    monkeypatch.setenv('CACHE_DIR', str(tmp_path))
+    feed = """<rss><channel>
+    <item><guid isPermaLink="false">post-1</guid></item>
+    <item><guid>
+        https://example.com/post-2
+    </guid></item>
+    </channel></rss>"""
+    
+    assert Scraper()._scan_feed_entry_ids(feed) == {'post-1', 'https://example.com/post-2'}
+
+def test_conditional_headers(tmp_path, monkeypatch):
+    """Test conditional GET headers are built from the stored feed state"""
+    monkeypatch.setenv('CACHE_DIR', str(tmp_path))
+    scraper = Scraper()
+    
+    assert scraper._conditional_headers({}) == {}
+    assert scraper._conditional_headers({'etag': '"abc"', 'last_modified': 'Sat, 01 Feb 2025 00:00:00 GMT'}) == {
+        'If-None-Match': '"abc"',
+        'If-Modified-Since': 'Sat, 01 Feb 2025 00:00:00 GMT'
+    }
+
+@pytest.mark.asyncio
+async def test_rss_conditional_get_short_circuits(tmp_path, monkeypatch):
+    """Test unchanged feeds are skipped via ETag and entry id checks"""
+    monkeypatch.setenv('CACHE_DIR', str(tmp_path))
+    feed = """<rss><channel><item><guid>post-1</guid><link>https://example.com/post-1</link>
+    <title>Post One</title><pubDate>Sat, 01 Feb 2025 00:00:00 GMT</pubDate></item></channel></rss>"""
+    requests_seen = []
+    
+    def handler(request):
+        requests_seen.append(request)
+        if request.headers.get('If-None-Match') == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, text=feed, headers={'ETag': '"v1"'})
+    
+    async with Scraper() as scraper:
+        scraper.http.transport = httpx.MockTransport(handler)
+        first = await scraper.extract_from_rss("https://example.com/feed")
+        # Nothing is remembered until the run has handled the entries
+        again = await scraper.extract_from_rss("https://example.com/feed")
+        scraper.save_feed_state(lambda article: True)
+        second = await scraper.extract_from_rss("https://example.com/feed")
+    
+    assert [post['url'] for post in first] == ['https://example.com/post-1']
+    assert again == first
+    assert second == []
+    assert 'If-None-Match' not in requests_seen[1].headers
+    assert requests_seen[2].headers['If-None-Match'] == '"v1"'
+
+@pytest.mark.asyncio
+async def test_rss_feed_state_forgotten_while_entries_are_pending(tmp_path, monkeypatch):
+    """Test a feed with unprocessed entries is fetched in full again next run"""
+    monkeypatch.setenv('CACHE_DIR', str(tmp_path))
+    feed = """<rss><channel><item><guid>post-1</guid><link>https://example.com/post-1</link>
+    <title>Post One</title><pubDate>Sat, 01 Feb 2025 00:00:00 GMT</pubDate></item></channel></rss>"""
+    
+    def handler(request):
+        if request.headers.get('If-None-Match') == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, text=feed, headers={'ETag': '"v1"'})
+    
+    async with Scraper() as scraper:
+        scraper.http.transport = httpx.MockTransport(handler)
+        await scraper.extract_from_rss("https://example.com/feed")
+        scraper.save_feed_state(lambda article: True)
+        # The feed changed, but the run was cut short before its entry was processed
+        scraper.feed_state.set("https://example.com/feed", {'etag': '"v0"'})
+        await scraper.extract_from_rss("https://example.com/feed")
+        scraper.save_feed_state(lambda article: False)
+        retried = await scraper.extract_from_rss("https://example.com/feed")
+    
+    assert [post['url'] for post in retried] == ['https://example.com/post-1']
+
+@pytest.mark.asyncio
+async def test_html_static_fast_path_and_js_fallback(tmp_path, monkeypatch):
+    """Test static pages skip the browser and JS-only pages are learned per domain"""
+    monkeypatch.setenv('CACHE_DIR', str(tmp_path))
+    article = "<html><body><article>" + "<p>Static paragraph of text.</p>" * 50 + "</article></body></html>"
+    
+    def handler(request):
+        if request.url.host == 'static.example.com':
+            return httpx.Response(200, text=article, headers={'Content-Type': 'text/html'})
+        return httpx.Response(200, text="<html><body><div id='app'></div></body></html>", headers={'Content-Type': 'text/html'})
+    
+    rendered = []
+    async def fake_render(url, wait_until='networkidle'):
+        rendered.append(url)
+        return article
+    
+    async with Scraper() as scraper:
+        scraper.http.transport = httpx.MockTransport(handler)
+        monkeypatch.setattr(scraper, '_get_page_html', fake_render)
+        
+        assert "Static paragraph" in await scraper.scrape_article("https://static.example.com/post")
+        assert rendered == []
+        
+        assert "Static paragraph" in await scraper.scrape_article("https://spa.example.com/post")
+        assert rendered == ["https://spa.example.com/post"]
+        assert scraper._needs_js("spa.example.com")
+        assert not scraper._needs_js("static.example.com")
+
+@pytest.mark.asyncio
+async def test_pdf_extraction_stops_at_char_budget(tmp_path, monkeypatch):
+    """Test PDF text is extracted lazily up to the LLM character budget"""
+    monkeypatch.setenv('CACHE_DIR', str(tmp_path))
+    pdf = make_pdf([f"Page {number} of the report" for number in range(1, 21)])
+    
+    async with Scraper() as scraper:
+        scraper.http.transport = httpx.MockTransport(lambda request: httpx.Response(200, content=pdf))
+        scraper.limits['pdf_max_chars'] = 40
+        text = await scraper.scrape_article("https://example.com/report.pdf")
+    
+    assert "Page 1 of the report" in text
+    assert "Page 2 of the report" in text
+    assert "Page 3 of the report" not in text
+
+@pytest.mark.asyncio
+async def test_oversized_pdf_is_skipped(tmp_path, monkeypatch):
+    """Test a PDF over pdf_max_bytes is skipped, before download when its size is declared"""
+    monkeypatch.setenv('CACHE_DIR', str(tmp_path))
+    pdf = make_pdf(["Page 1 of the report"])
+    streamed = []
+    
+    async def body():
+        streamed.append(pdf)
+        yield pdf
+    
+    def handler(request):
+        if request.url.path == '/declared.pdf':
+            return httpx.Response(200, headers={'Content-Length': str(len(pdf))}, content=body())
+        return httpx.Response(200, content=body())  # chunked, no Content-Length
+    
+    async with Scraper() as scraper:
+        scraper.http.transport = httpx.MockTransport(handler)
+        scraper.limits['pdf_max_bytes'] = len(pdf) - 1
+        
+        assert await scraper.scrape_article("https://example.com/declared.pdf") == ""
+        assert streamed == [], "A declared oversized PDF should not be downloaded"
+        assert await scraper.scrape_article("https://example.com/chunked.pdf") == ""
+        
+        scraper.limits['pdf_max_bytes'] = len(pdf)
+        assert "Page 1 of the report" in await scraper.scrape_article("https://example.com/declared.pdf")
+
+@pytest.mark.asyncio
+async def test_prefetched_page_is_not_downloaded_again(tmp_path, monkeypatch):
+    """Test a page prefetched to date an index link is reused by fetch_article"""
+    monkeypatch.setenv('CACHE_DIR', str(tmp_path))
+    requests = []
+    
+    def handler(request):
+        requests.append(str(request.url))
+        return httpx.Response(200, text="<html><body>Post</body></html>", headers={'Content-Type': 'text/html'})
+    
+    async with Scraper() as scraper:
+        scraper.http.transport = httpx.MockTransport(handler)
+        html = await scraper.prefetch_html("https://example.com/post")
+        page = await scraper.fetch_article("https://example.com/post")
+        assert page['body'] == html
+        assert requests == ["https://example.com/post"]
+        
+        await scraper.fetch_article("https://example.com/post")
+        assert len(requests) == 2, "A prefetched page should only be reused once"
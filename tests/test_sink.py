@@ -0,0 +1,40 @@
+import json
+from content_aggregator.sink import JsonlSink
+
+def _article(url):
+    return {'url': url, 'title': None, 'summary': f"summary of {url}"}
+
+def test_sink_streams_and_finalizes(tmp_path):
+    sink = JsonlSink(str(tmp_path / 'results.jsonl'))
+    sink.write(_article('https://a.example.com/1'))
+    sink.write(_article('https://a.example.com/2'))
+
+    # Each article is on disk before finalize
+    assert [json.loads(line)['url'] for line in open(sink.path)] == ['https://a.example.com/1', 'https://a.example.com/2']
+
+    json_path = tmp_path / 'results.json'
+    sink.finalize(str(json_path))
+    assert [article['url'] for article in json.loads(json_path.read_text())] == ['https://a.example.com/1', 'https://a.example.com/2']
+    assert not (tmp_path / 'results.json.tmp').exists()
+
+def test_sink_resumes_after_a_torn_write(tmp_path):
+    path = tmp_path / 'results.jsonl'
+    path.write_text(json.dumps(_article('https://a.example.com/1')) + '\n{"url": "https://a.exa')
+
+    sink = JsonlSink(str(path))
+    assert sink.completed_urls() == {'https://a.example.com/1'}
+
+    sink.write(_article('https://a.example.com/2?utm_source=rss'))
+    sink.close()
+    assert [article['url'] for article in sink.read()] == ['https://a.example.com/1', 'https://a.example.com/2?utm_source=rss']
+    assert 'https://a.example.com/2' in sink.completed_urls()
+
+def test_sink_finalize_writes_given_order(tmp_path):
+    sink = JsonlSink(str(tmp_path / 'results.jsonl'))
+    for url in ['https://a.example.com/2', 'https://a.example.com/1']:
+        sink.write(_article(url))
+    articles = sorted(sink.read(), key=lambda article: article['url'])
+
+    json_path = tmp_path / 'results.json'
+    sink.finalize(str(json_path), articles)
+    assert json.loads(json_path.read_text()) == articles
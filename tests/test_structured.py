@@ -0,0 +1,31 @@
+import json
+from content_aggregator.structured import parse_batch, parse_json, parse_summary, parse_tagged, recover_fields, repair_json
+
+def test_repair_json_closes_truncated_output():
+    assert json.loads(repair_json('{"title": "A", "summary": "cut off')) == {"title": "A", "summary": "cut off"}
+    assert json.loads(repair_json('[{"id": 1, "title": "A"}, {"id": 2, "tit')) == [{"id": 1, "title": "A"}, {"id": 2}]
+    assert json.loads(repair_json('{"title": "A", "summary":')) == {"title": "A"}
+    assert json.loads(repair_json('{"tags": "a, b",}')) == {"tags": "a, b"}
+    assert json.loads(repair_json('{"summary": "line one\nline two"}')) == {"summary": "line one\nline two"}
+
+def test_parse_json_strips_code_fences():
+    assert parse_json('```json\n{"title": "A"}\n```') == {"title": "A"}
+    assert parse_json('not json at all') is None
+
+def test_parse_tagged_tolerates_missing_close_tags():
+    fields = parse_tagged("<tags>x, y</tags><title>Title<summary>Summary text")
+    assert fields == {'tags': "x, y", 'title': "Title", 'summary': "Summary text"}
+
+def test_recover_fields_reads_broken_json():
+    fields = recover_fields('garbage {"title": "A \\"quoted\\" title", "id": 3, "summary": "unfinished')
+    assert fields == {'title': 'A "quoted" title', 'id': '3', 'summary': "unfinished"}
+
+def test_parse_summary_handles_json_and_tags():
+    assert parse_summary('{"title": "A", "tags": ["x", "y"], "extra": 1}') == {'title': "A", 'tags': "x, y"}
+    assert parse_summary("<title>A</title><summary>S</summary>") == {'title': "A", 'summary': "S"}
+
+def test_parse_batch_maps_ids_to_fields():
+    response = '[{"id": 1, "title": "A", "summary": "S"}, {"title": "no id"}, {"id": "2", "summary": "T'
+    assert parse_batch(response) == {1: {'title': "A", 'summary': "S"}, 2: {'summary': "T"}}
+    tagged = '<article id="1"><title>A</title></article><article id="2"><title>B'
+    assert parse_batch(tagged) == {1: {'title': "A"}, 2: {'title': "B"}}
@@ -49,4 +49,4 @@ def test_deduplicate_mixed_case_keys():
     ]
     result = deduplicate(articles, lambda x: x['url'])
     assert len(result) == 2
-    assert [a['url'] for a in result] == ['A', 'a'] 
\ No newline at end of file
+    assert [a['url'] for a in result] == ['A', 'a']